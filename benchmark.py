@@ -0,0 +1,607 @@
+# Benchmark offline untuk hot path bot (join wave, ticket, on_message, warn store).
+# Semua call Discord lewat FakeDiscordAPI (latency + bucket rate limit palsu),
+# avatar/attachment diambil dari CDN lokal, DB ditulis ke folder temp. Tidak butuh token.
+#
+#   python benchmark.py                      # semua scenario, median dari 3 run
+#   python benchmark.py join_wave --members 500 --cdn-latency 40
+#   python benchmark.py --api-latency 50 --json bench.json
+#   python benchmark.py card_encode          # waktu encode + ukuran per CARD_FORMAT
+import os
+import io
+import sys
+import json
+import time
+import random
+import logging
+import atexit
+import shutil
+import asyncio
+import argparse
+import datetime
+import tempfile
+import statistics
+
+# DB sementara + metrics endpoint mati, harus di-set sebelum import discordbot.
+# File JSON lama juga diarahkan ke temp: migrasi 1 jalan saat import dan akan
+# memindahkan tickets.json / warns.json asli ke DB benchmark.
+_TMP_DIR = tempfile.mkdtemp(prefix="vora-bench-")
+atexit.register(shutil.rmtree, _TMP_DIR, ignore_errors=True)
+os.environ.setdefault("VORA_DB_FILE", os.path.join(_TMP_DIR, "bench.db"))
+os.environ["VORA_TICKET_DATA_FILE"] = os.path.join(_TMP_DIR, "tickets.json")
+os.environ["VORA_WARN_FILE"] = os.path.join(_TMP_DIR, "warns.json")
+os.environ.setdefault("METRICS_PORT", "0")
+
+import aiohttp
+from aiohttp import web
+from PIL import Image
+
+import discordbot as bot
+
+# Log INFO per event cuma noise di sini, yang dilihat angka akhirnya
+for _name in bot.LOG_SUBSYSTEMS:
+    logging.getLogger(f"vora.{_name}").setLevel(logging.WARNING)
+bot.client.attachment_archiver = bot.AttachmentArchiver(os.path.join(_TMP_DIR, "attachments"))
+
+
+# ---------------------------
+# FAKE DISCORD API
+# ---------------------------
+# Pengganti REST API Discord: tiap call kena latency tetap dan bucket rate limit
+# per route (limit per window, window di-skala `time_scale` supaya benchmark
+# tidak perlu nunggu detik beneran). Kalau bucket habis, call dihitung sebagai
+# 429 lalu tidur sampai reset, sama seperti discord.py.
+class FakeDiscordAPI:
+    BUCKETS = {
+        "channel.send": (5, 5.0),
+        "channel.create": (10, 10.0),
+        "channel.delete": (5, 5.0),
+        "channel.history": (50, 1.0),
+        "member.roles": (10, 10.0),
+        "member.dm": (5, 5.0),
+        "interaction": (50, 1.0),
+    }
+
+    def __init__(self, latency=0.0, time_scale=0.001):
+        self.latency = latency
+        self.time_scale = time_scale
+        self.calls = 0
+        self.rate_limited = 0
+        self.buckets = {}
+
+    def reset_counters(self):
+        self.calls = 0
+        self.rate_limited = 0
+
+    async def request(self, route, major=None):
+        self.calls += 1
+        limit, window = self.BUCKETS.get(route, (50, 1.0))
+        window *= self.time_scale
+        key = (route, major)
+        now = time.perf_counter()
+        remaining, reset_at = self.buckets.get(key, (limit, now + window))
+        if now >= reset_at:
+            remaining, reset_at = limit, now + window
+        if remaining <= 0:
+            self.rate_limited += 1
+            bot.rate_limit_hits.inc("discord")
+            await asyncio.sleep(reset_at - now)
+            remaining, reset_at = limit, time.perf_counter() + window
+        self.buckets[key] = (remaining - 1, reset_at)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeAsset:
+    def __init__(self, key, base_url):
+        self.key = key
+        self.url = f"{base_url}/avatars/{key}.png"
+
+    def with_size(self, size):
+        return self
+
+
+class FakeRole:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+
+class FakePermissions:
+    def __init__(self, value=True):
+        self.kick_members = value
+        self.ban_members = value
+        self.moderate_members = value
+        self.manage_channels = value
+        self.manage_messages = value
+        self.administrator = value
+
+
+class FakeMember:
+    def __init__(self, api, guild, member_id, name, avatar_url, roles=(), bot_account=False):
+        self.api = api
+        self.guild = guild
+        self.id = member_id
+        self.name = name
+        self.bot = bot_account
+        self.mention = f"<@{member_id}>"
+        self.display_avatar = FakeAsset(f"a_{member_id}", avatar_url)
+        self.avatar = self.display_avatar
+        self.roles = list(roles)
+        self.guild_permissions = FakePermissions()
+        self.joined_at = datetime.datetime.now(datetime.timezone.utc)
+        self.created_at = self.joined_at - datetime.timedelta(days=365)
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, *args, **kwargs):
+        await self.api.request("member.dm", self.id)
+
+    async def add_roles(self, *roles, **kwargs):
+        await self.api.request("member.roles", self.guild.id)
+        self.roles.extend(roles)
+
+    async def timeout(self, duration, **kwargs):
+        await self.api.request("member.moderate", self.guild.id)
+
+
+class FakeAttachment:
+    def __init__(self, attachment_id, filename, url, size):
+        self.id = attachment_id
+        self.filename = filename
+        self.url = url
+        self.size = size
+
+
+class FakeMessage:
+    def __init__(self, api, message_id, channel, author, content, attachments=()):
+        self.api = api
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.attachments = list(attachments)
+        self.mentions = []
+        self.role_mentions = []
+        self.mention_everyone = False
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+
+    async def delete(self):
+        await self.api.request("message.delete", self.channel.id)
+
+
+class FakeChannel:
+    def __init__(self, api, guild, channel_id, name):
+        self.api = api
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self.messages = []
+        self.sent = 0
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, *, embed=None, embeds=None, file=None, files=None, view=None, **kwargs):
+        await self.api.request("channel.send", self.id)
+        for f in ([file] if file else []) + list(files or []):
+            f.close()
+        self.sent += 1
+        message = FakeMessage(self.api, self.guild.next_id(), self, self.guild.me, content or "")
+        self.messages.append(message)
+        return message
+
+    async def history(self, limit=None, after=None, oldest_first=True):
+        after_id = after.id if after is not None else 0
+        messages = [m for m in self.messages if m.id > after_id]
+        for i in range(0, len(messages), 100):
+            await self.api.request("channel.history", self.id)
+            for message in messages[i:i + 100]:
+                yield message
+
+    async def set_permissions(self, *args, **kwargs):
+        await self.api.request("channel.permissions", self.id)
+
+    async def delete(self):
+        await self.api.request("channel.delete", self.guild.id)
+        self.guild.channels.pop(self.id, None)
+
+
+class FakeGuild:
+    def __init__(self, api, avatar_url):
+        self.api = api
+        self.id = 1
+        self.name = "Bench Guild"
+        self.owner_id = 7
+        self.icon = None
+        self._next_id = 10 ** 17
+        self.avatar_url = avatar_url
+        self.channels = {}
+        self.roles = {
+            role_id: FakeRole(role_id, name)
+            for role_id, name in (
+                (bot.STAFF_ROLE_ID, "Staff"),
+                (bot.HELPER_ROLE_ID, "Helper"),
+                (bot.DEFAULT_ROLE_ID, "Member"),
+            )
+        }
+        self.default_role = FakeRole(self.id, "@everyone")
+        self.me = FakeMember(api, self, 42, "VoraBot", avatar_url, bot_account=True)
+        self.members = []
+        for channel_id, name in (
+            (bot.WELCOME_CHANNEL, "welcome"),
+            (bot.TICKET_LOG_CHANNEL_ID, "ticket-log"),
+            (bot.TICKET_CATEGORY_ID, "tickets"),
+            (bot.TICKET_CATEGORY_ID_X8, "tickets-x8"),
+            *((c, f"shop-{i}") for i, c in enumerate(bot.SHOP_CHANNELS)),
+            (1, "general"),
+        ):
+            self.channels[channel_id] = FakeChannel(api, self, channel_id, name)
+
+    def next_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def add_member(self, name, roles=()):
+        member = FakeMember(self.api, self, self.next_id(), name, self.avatar_url, roles)
+        self.members.append(member)
+        return member
+
+    async def create_text_channel(self, name, category=None, overwrites=None, **kwargs):
+        await self.api.request("channel.create", self.id)
+        channel = FakeChannel(self.api, self, self.next_id(), name)
+        self.channels[channel.id] = channel
+        return channel
+
+
+class FakeResponse:
+    def __init__(self, api):
+        self.api = api
+        self.done = False
+
+    async def send_message(self, *args, **kwargs):
+        await self.api.request("interaction")
+        self.done = True
+
+    async def defer(self, *args, **kwargs):
+        await self.api.request("interaction")
+        self.done = True
+
+    async def edit_message(self, *args, **kwargs):
+        await self.api.request("interaction")
+        self.done = True
+
+    def is_done(self):
+        return self.done
+
+
+class FakeFollowup:
+    def __init__(self, api):
+        self.api = api
+
+    async def send(self, *args, **kwargs):
+        await self.api.request("interaction")
+
+
+class FakeInteraction:
+    def __init__(self, api, user, guild, channel=None, custom_id=None):
+        self.user = user
+        self.guild = guild
+        self.channel = channel
+        self.client = bot.client
+        self.data = {"custom_id": custom_id}
+        self.extras = {}
+        self.response = FakeResponse(api)
+        self.followup = FakeFollowup(api)
+
+
+# ---------------------------
+# AVATAR CDN
+# ---------------------------
+async def start_fake_cdn(latency):
+    buffer = io.BytesIO()
+    Image.new("RGB", (bot.AVATAR_FETCH_SIZE, bot.AVATAR_FETCH_SIZE), (52, 152, 219)).save(buffer, "PNG")
+    png = buffer.getvalue()
+
+    async def avatar(request):
+        if latency:
+            await asyncio.sleep(latency)
+        return web.Response(body=png, content_type="image/png")
+
+    # Isi attachment ditentukan id % 8, jadi ada file kembar untuk dedup
+    async def attachment(request):
+        if latency:
+            await asyncio.sleep(latency)
+        seed = int(request.match_info["id"]) % 8
+        return web.Response(body=random.Random(seed).randbytes(64 * 1024), content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/avatars/{key}", avatar)
+    app.router.add_get("/attachments/{id}/{filename}", attachment)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+# ---------------------------
+# SCENARIOS
+# ---------------------------
+# Tiap scenario return dict angka; `elapsed` dipakai untuk median antar repeat.
+async def bench_join_wave(ctx, members):
+    guild = ctx["guild"]
+    wave = [guild.add_member(f"raider{i:04}") for i in range(members)]
+    bot.client.avatar_cache = bot.AvatarCache()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bot.client.create_welcome_image(m, "welcome") for m in wave))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bot.client.create_welcome_image(m, "welcome") for m in wave))
+    warm = time.perf_counter() - start
+
+    # Jalur announcer penuh (coalescing) dengan window 0 detik
+    bot.ANNOUNCE_WINDOW = 0
+    ctx["api"].reset_counters()
+    done = asyncio.Event()
+    processed = 0
+
+    class CountingAnnouncer(bot.JoinLeaveAnnouncer):
+        async def send_single(self, member, mode):
+            nonlocal processed
+            await super().send_single(member, mode)
+            processed += 1
+            if processed >= members:
+                done.set()
+
+        async def send_summary(self, members_, mode):
+            nonlocal processed
+            await super().send_summary(members_, mode)
+            processed += len(members_)
+            if processed >= members:
+                done.set()
+
+    announcer = CountingAnnouncer(bot.client)
+    announcer.start()
+    start = time.perf_counter()
+    for member in wave:
+        announcer.enqueue(member, "welcome")
+    await done.wait()
+    announce = time.perf_counter() - start
+    announcer.stop()
+
+    return {
+        "elapsed": cold,
+        "cards_per_sec_cold": members / cold,
+        "cards_per_sec_warm": members / warm,
+        "announce_seconds": announce,
+        "announce_api_calls": ctx["api"].calls,
+        "announce_429": ctx["api"].rate_limited,
+    }
+
+
+async def bench_tickets(ctx, tickets, messages_per_ticket):
+    guild = ctx["guild"]
+    api = ctx["api"]
+    rng = random.Random(ctx["seed"])
+    staff = guild.add_member("staff", roles=[guild.get_role(bot.STAFF_ROLE_ID), guild.get_role(bot.HELPER_ROLE_ID)])
+    users = [guild.add_member(f"user{i:04}") for i in range(tickets)]
+    # Yang diukur jalur buat/tutup ticket, bukan limiter-nya
+    bot.ticket_guild_limiter = bot.TokenBucket(10 ** 9, 1)
+    bot.ticket_user_limiter = bot.TokenBucket(10 ** 9, 1)
+    api.reset_counters()
+
+    start = time.perf_counter()
+    for user in users:
+        await bot.create_ticket(FakeInteraction(api, user, guild), "Bug / Misconduct Report")
+    open_elapsed = time.perf_counter() - start
+    open_calls = api.calls
+
+    channels = [guild.get_channel(bot.active_tickets.get_by_user(u.id).channel_id) for u in users]
+    for channel, user in zip(channels, users):
+        for i in range(messages_per_ticket):
+            attachments = []
+            if rng.random() < 0.05:
+                attachment_id = guild.next_id()
+                url = f"{guild.avatar_url}/attachments/{attachment_id}/proof.png"
+                attachments.append(FakeAttachment(attachment_id, "proof.png", url, 64 * 1024))
+            content = " ".join(rng.choice(("halo", "bug", "tolong", "cek", "ini", "min")) for _ in range(rng.randint(1, 20)))
+            channel.messages.append(FakeMessage(api, guild.next_id(), channel, user, content, attachments))
+
+    api.reset_counters()
+    view = bot.TicketControlView()
+    start = time.perf_counter()
+    for channel in channels:
+        await view.close_ticket_callback(FakeInteraction(api, staff, guild, channel, "close_ticket"))
+    close_elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": open_elapsed + close_elapsed,
+        "open_per_sec": tickets / open_elapsed,
+        "open_api_calls": open_calls,
+        "close_per_sec": tickets / close_elapsed,
+        "close_messages_per_sec": tickets * messages_per_ticket / close_elapsed,
+        "close_api_calls": api.calls,
+    }
+
+
+async def bench_on_message(ctx, messages, chatters):
+    guild = ctx["guild"]
+    rng = random.Random(ctx["seed"])
+    authors = [guild.add_member(f"chatter{i:05}") for i in range(chatters)]
+    for author in authors:
+        author.guild_permissions = FakePermissions(False)   # supaya ikut dicek anti-spam
+    channels = [guild.get_channel(c) for c in bot.SHOP_CHANNELS] + [guild.get_channel(1)]
+    samples = ["!hello", "beli premium", "BUY now", "halo semua", "ada yang online?", "gg", "buyer nih", "wkwk " * 20]
+    batch = [
+        FakeMessage(ctx["api"], guild.next_id(), rng.choice(channels), rng.choice(authors), rng.choice(samples))
+        for _ in range(messages)
+    ]
+    ctx["api"].reset_counters()
+
+    start = time.perf_counter()
+    for message in batch:
+        await bot.client.on_message(message)
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed": elapsed,
+        "messages_per_sec": messages / elapsed,
+        "replies": ctx["api"].calls,
+        "spam_tracked_users": len(bot.client.anti_spam),
+    }
+
+
+async def bench_warns(ctx, mutations):
+    rng = random.Random(ctx["seed"])
+    guild_id = "1"
+    members = [str(10 ** 17 + i) for i in range(200)]
+
+    start = time.perf_counter()
+    for i in range(mutations):
+        bot.add_warn(guild_id, rng.choice(members), f"raid #{i}", 42, None)
+    added = time.perf_counter() - start
+
+    start = time.perf_counter()
+    removed = 0
+    for member_id in members:
+        while bot.get_warns(guild_id, member_id) and removed < mutations // 2:
+            bot.remove_warn(guild_id, member_id)
+            removed += 1
+    remove_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    future = bot.store.warn_writes.flush()
+    if future is not None:
+        await asyncio.wrap_future(future)
+    flush = time.perf_counter() - start
+
+    return {
+        "elapsed": added + remove_elapsed + flush,
+        "add_per_sec": mutations / added,
+        "remove_per_sec": removed / remove_elapsed if removed else 0.0,
+        "flush_seconds": flush,
+    }
+
+
+# Micro-benchmark encoder kartu: satu kartu 735x386 (avatar diambil dari potongan
+# background supaya isinya mirip foto, bukan warna flat) di-encode berulang per
+# format/quality. Render-nya sendiri tidak ikut diukur.
+CARD_ENCODE_VARIANTS = [
+    ("png", 1), ("png", 6), ("png", 9),
+    ("png8", 128), ("png8", 256),
+    ("webp", 75), ("webp", 85), ("webp", 95),
+    ("jpeg", 80), ("jpeg", 88), ("jpeg", 95),
+]
+
+
+async def bench_card_encode(ctx, iterations):
+    renderer = bot.client.card_renderer
+    avatar = Image.open(bot.CARD_BACKGROUND_FILE).convert("RGBA").crop((0, 0, bot.AVATAR_SIZE, bot.AVATAR_SIZE))
+    avatar.putalpha(renderer.mask)
+    card = renderer.bases["welcome"].copy()
+    card.paste(avatar, (bot.AVATAR_POS[0] + bot.AVATAR_BORDER, bot.AVATAR_POS[1] + bot.AVATAR_BORDER), avatar)
+
+    results = {"elapsed": 0.0}
+    for fmt, quality in CARD_ENCODE_VARIANTS:
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            size = len(bot.encode_card(card, fmt, quality).getbuffer())
+            timings.append(time.perf_counter() - start)
+        results["elapsed"] += sum(timings)
+        results[f"{fmt}_{quality}_ms"] = statistics.median(timings) * 1000
+        results[f"{fmt}_{quality}_kb"] = size / 1024
+    return results
+
+
+SCENARIOS = {
+    "join_wave": lambda ctx, a: bench_join_wave(ctx, a.members),
+    "tickets": lambda ctx, a: bench_tickets(ctx, a.tickets, a.ticket_messages),
+    "on_message": lambda ctx, a: bench_on_message(ctx, a.messages, a.chatters),
+    "warns": lambda ctx, a: bench_warns(ctx, a.warns),
+    "card_encode": lambda ctx, a: bench_card_encode(ctx, a.encode_iterations),
+}
+
+
+async def run(args):
+    api = FakeDiscordAPI(latency=args.api_latency / 1000, time_scale=args.time_scale)
+    cdn, avatar_url = await start_fake_cdn(args.cdn_latency / 1000)
+    bot.client.session = aiohttp.ClientSession(timeout=bot.HTTP_TIMEOUT)
+    # Pacing outbound ikut di-skala sama seperti bucket FakeDiscordAPI
+    capacity, per_seconds = bot.OUTBOUND_RATE_PER_CHANNEL
+    bot.outbound = bot.OutboundScheduler(rate=(capacity, per_seconds * args.time_scale))
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            runs = []
+            for repeat in range(args.repeat):
+                ctx = {"api": api, "guild": FakeGuild(api, avatar_url), "seed": args.seed + repeat}
+                runs.append(await SCENARIOS[name](ctx, args))
+            median = sorted(runs, key=lambda r: r["elapsed"])[len(runs) // 2]
+            results[name] = {
+                **median,
+                "elapsed_stdev": statistics.pstdev(r["elapsed"] for r in runs),
+            }
+    finally:
+        bot.outbound.stop()
+        await bot.client.session.close()
+        await cdn.cleanup()
+        bot.client.card_executor.shutdown(wait=True)
+        bot.store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark hot path bot dengan fake Discord API.")
+    parser.add_argument("scenarios", nargs="*", help=f"subset dari: {', '.join(SCENARIOS)} (default semua)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--members", type=int, default=200, help="join wave size")
+    parser.add_argument("--tickets", type=int, default=20)
+    parser.add_argument("--ticket-messages", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=50000, help="on_message routing count")
+    parser.add_argument("--chatters", type=int, default=2000, help="jumlah author di on_message")
+    parser.add_argument("--warns", type=int, default=5000)
+    parser.add_argument("--encode-iterations", type=int, default=10, help="encode per format di card_encode")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="ms per fake API call")
+    parser.add_argument("--cdn-latency", type=float, default=0.0, help="ms per avatar download")
+    parser.add_argument("--time-scale", type=float, default=0.001, help="rate-limit window scale")
+    parser.add_argument("--json", help="tulis hasil ke file JSON")
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"scenario tidak dikenal: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+    results["_meta"] = {
+        "python": sys.version.split()[0],
+        "args": {k: v for k, v in vars(args).items() if k != "json"},
+    }
+
+    for name, values in results.items():
+        if name == "_meta":
+            continue
+        print(f"{name}")
+        for key, value in values.items():
+            print(f"  {key:<26} {value:,.4f}" if isinstance(value, float) else f"  {key:<26} {value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,269 @@
 import os
 import json
 import io
+import asyncio
+import threading
 import aiohttp
 import datetime
+import time
+import html
+import gzip
+import shutil
+import tarfile
+import tempfile
+import heapq
+import math
+import hashlib
+import re
+import sqlite3
+import atexit
+import signal
+import queue
+import logging
+import logging.handlers
+import functools
+import inspect
+import bisect
 import discord as dc
+from abc import ABC, abstractmethod
 from datetime import timedelta
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from discord import ui, Interaction, ButtonStyle, Embed
 from PIL import Image, ImageDraw, ImageFont
-from typing import Literal
+from typing import Literal, NamedTuple, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from aiohttp import web
 
 
-WARN_FILE = "warns.json"
+# ---------------------------
+# LOGGING
+# ---------------------------
+# Semua log (termasuk discord.py) lewat QueueHandler: event loop cuma taruh
+# record ke queue, yang nulis ke stdout thread QueueListener. Level per
+# subsystem bisa di-override lewat env, contoh LOG_LEVEL_TICKETS=DEBUG.
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SUBSYSTEMS = {
+    "tickets": "INFO",
+    "moderation": "INFO",
+    "welcome": "INFO",
+    "panels": "INFO",
+    "commands": "INFO",
+    "store": "INFO",
+    "messages": "INFO",   # set DEBUG untuk log pesan (di-sample, lihat MESSAGE_LOG_SAMPLE_EVERY)
+}
+MESSAGE_LOG_SAMPLE_EVERY = 100
+
+
+def setup_logging():
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+    for name, level in LOG_SUBSYSTEMS.items():
+        logging.getLogger(f"vora.{name}").setLevel(os.getenv(f"LOG_LEVEL_{name.upper()}", level))
+
+
+# Log 1 dari tiap `every` panggilan; hit() cuma increment counter
+class LogSampler:
+    def __init__(self, every):
+        self.every = max(1, every)
+        self.count = 0
+
+    def hit(self):
+        self.count += 1
+        return self.count % self.every == 1 or self.every == 1
+
+
+setup_logging()
+log = logging.getLogger("vora")
+log_tickets = logging.getLogger("vora.tickets")
+log_moderation = logging.getLogger("vora.moderation")
+log_welcome = logging.getLogger("vora.welcome")
+log_panels = logging.getLogger("vora.panels")
+log_commands = logging.getLogger("vora.commands")
+log_store = logging.getLogger("vora.store")
+log_messages = logging.getLogger("vora.messages")
+message_log_sampler = LogSampler(MESSAGE_LOG_SAMPLE_EVERY)
+
+# ---------------------------
+# METRICS
+# ---------------------------
+# Format teks Prometheus di http://METRICS_HOST:METRICS_PORT/metrics.
+# Observe cuma update beberapa angka di memori; teks baru dibuat saat di-scrape.
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))   # 0 = endpoint mati
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in self.values.items():
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}   # label_values -> [counts per bucket..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in self.series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    le = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+command_latency = metrics.histogram("vora_command_duration_seconds", "Slash command latency.", ["command", "status"])
+view_latency = metrics.histogram("vora_view_callback_duration_seconds", "View button callback latency.", ["view", "callback"])
+ticket_latency = metrics.histogram("vora_ticket_operation_duration_seconds", "Ticket create/close/transcript latency.", ["operation"])
+render_latency = metrics.histogram("vora_card_render_duration_seconds", "Welcome card render latency.", ["kind"])
+store_latency = metrics.histogram("vora_store_write_duration_seconds", "SQLite write/flush latency.", ["kind"])
+rate_limit_hits = metrics.counter("vora_http_429_total", "HTTP 429 responses received.", ["source"])
+spam_detections = metrics.counter("vora_spam_detections_total", "Messages flagged by the anti-spam engine.", ["kind"])
+raid_joins = metrics.counter("vora_lockdown_joins_total", "Joins handled while a guild is in raid lockdown.", ["verdict"])
+outbound_wait = metrics.histogram("vora_outbound_queue_seconds", "Time a message waits in the outbound queue.", ["priority"])
+
+
+# Bisa dipakai sebagai `with Timer(hist, "label"):` atau decorator (sync/async)
+class Timer:
+    def __init__(self, histogram, *labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+    def __call__(self, func):
+        histogram, labels = self.histogram, self.labels
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with Timer(histogram, *labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Timer(histogram, *labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+# Untuk callback view: label diambil dari nama class + method
+def timed_view_callback(func):
+    view_name, _, callback_name = func.__qualname__.rpartition(".")
+    return Timer(view_latency, view_name, callback_name)(func)
+
+
+# discord.py sudah handle retry 429 sendiri, tapi selalu log warning
+# "... responded with 429 ..." di logger discord.http -> dihitung di sini.
+class RateLimitLogCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+
+    def emit(self, record):
+        if "429" in str(record.msg):
+            rate_limit_hits.inc("discord")
+
+
+logging.getLogger("discord.http").addHandler(RateLimitLogCounter())
+
+
+async def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
 
-if os.path.exists(WARN_FILE):
-    with open(WARN_FILE, "r") as f:
-        warns = json.load(f)
-else:
-    warns = {}
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info("Metrics endpoint di http://%s:%s/metrics", host, port)
+    return runner
 
-def save_warns():
-    with open(WARN_FILE, "w") as f:
-        json.dump(warns, f, indent=4)
 
 TICKET_PANEL_CHANNEL_ID = 1434769506798010480
 TICKET_LOG_CHANNEL_ID = 1452681875029102624
@@ -36,39 +277,571 @@ TICKET_CATEGORY_ID_X8 = 1443965063533953104
 UNVERIFIED_ROLE_ID = 1434816903439843359
 MEMBER_ROLE_ID = 1434816903439843359
 
+# Tidak bisa di-kick/ban/timeout lewat command (termasuk bulk)
+IMMUNE_USERS = frozenset({
+    706872385844019200,
+    768832997125259315,
+    987654321098765432,
+})
+
 VORA_BLUE = 0x3498db
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TICKET_DATA_FILE = os.path.join(BASE_DIR, "tickets.json")
+DB_FILE = os.getenv("VORA_DB_FILE", os.path.join(BASE_DIR, "vora.db"))
+
+# File JSON lama, cuma dibaca sekali untuk migrasi ke DB_FILE (bisa di-override
+# lewat env, benchmark.py mengarahkannya ke folder temp)
+WARN_FILE = os.getenv("VORA_WARN_FILE", "warns.json")
+TICKET_DATA_FILE = os.getenv("VORA_TICKET_DATA_FILE", os.path.join(BASE_DIR, "tickets.json"))
 
 # ---------------------------
-# LOAD / SAVE TICKETS
+# STORAGE
 # ---------------------------
-if not os.path.exists(TICKET_DATA_FILE):
-    with open(TICKET_DATA_FILE, "w") as f:
-        json.dump({}, f, indent=4)
-    active_tickets = {}
-else:
-    with open(TICKET_DATA_FILE, "r") as f:
+# "sync"    : tiap /warn /delwarn langsung di-commit (paling aman)
+# "batched" : mutasi warn ditahan di memori lalu di-commit bareng tiap
+#             WARN_FLUSH_INTERVAL detik atau WARN_FLUSH_MAX_PENDING mutasi
+WARN_DURABILITY = "batched"
+WARN_FLUSH_INTERVAL = 2.0
+WARN_FLUSH_MAX_PENDING = 50
+WARN_DEFAULT_EXPIRY_DAYS = None     # None = warn tidak pernah kadaluarsa
+WARN_PRUNE_INTERVAL_MINUTES = 10
+WARNLIST_PAGE_SIZE = 10                # maks warn per halaman
+WARNLIST_PAGE_CHARS = 4000             # limit description embed 4096
+WARNLIST_REASON_CHARS = 1000           # reason lebih panjang dipotong di list
+
+STORE_MIGRATIONS = [
+    """
+    CREATE TABLE tickets (
+        user_id INTEGER PRIMARY KEY,
+        channel_id INTEGER NOT NULL
+    );
+    CREATE TABLE warns (
+        id INTEGER PRIMARY KEY,
+        guild_id TEXT NOT NULL,
+        member_id TEXT NOT NULL,
+        reason TEXT NOT NULL
+    );
+    CREATE INDEX warns_member ON warns (guild_id, member_id);
+    """,
+    """
+    ALTER TABLE tickets ADD COLUMN category TEXT;
+    ALTER TABLE tickets ADD COLUMN created_at REAL;
+    CREATE INDEX tickets_channel ON tickets (channel_id);
+    """,
+    """
+    ALTER TABLE warns ADD COLUMN moderator_id INTEGER;
+    ALTER TABLE warns ADD COLUMN created_at REAL;
+    ALTER TABLE warns ADD COLUMN expires_at REAL;
+    CREATE INDEX warns_expiry ON warns (expires_at) WHERE expires_at IS NOT NULL;
+    """,
+    """
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """,
+]
+
+
+# SQLite (WAL) di belakang active_tickets / warns. Data di memori tetap jadi
+# sumber baca; setiap mutasi cuma satu INSERT/DELETE (warn lewat WriteBehindBuffer).
+# Koneksi dipegang satu worker thread, jadi query tidak pernah jalan di event
+# loop dan urutan tulis tetap terjaga.
+class BotStore:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+        self.conn = None
+        self.call(self._connect)
+        self.warn_writes = WriteBehindBuffer(self, WARN_FLUSH_INTERVAL, WARN_FLUSH_MAX_PENDING, WARN_DURABILITY)
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for i, script in enumerate(STORE_MIGRATIONS[version:], start=version + 1):
+            imported = []
+            with self.conn:
+                self.conn.execute("BEGIN")
+                for statement in script.split(";"):
+                    if statement.strip():
+                        self.conn.execute(statement)
+                # Import JSON lama satu transaksi dengan migrasi 1: kalau gagal,
+                # user_version ikut rollback dan import dicoba lagi saat start berikutnya
+                if i == 1:
+                    imported = self._import_legacy_json()
+                self.conn.execute(f"PRAGMA user_version = {i}")
+            for legacy in imported:
+                os.replace(legacy, legacy + ".migrated")
+                log_store.info("%s dipindah ke %s", legacy, self.path)
+
+    @staticmethod
+    def _read_legacy(path):
+        if not os.path.exists(path):
+            return None
         try:
-            data = json.load(f)
-            active_tickets = {int(k): v for k, v in data.items()}
-        except json.JSONDecodeError:
-            active_tickets = {}
+            with open(path, "r") as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            os.replace(path, path + ".corrupt")
+            log_store.error("%s tidak bisa dibaca (%s), dipindah ke %s.corrupt", path, e, path)
+            return None
+
+    # Jalan di dalam transaksi migrasi, return file yang berhasil di-import
+    def _import_legacy_json(self):
+        imported = []
+        data = self._read_legacy(TICKET_DATA_FILE)
+        if data is not None:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO tickets (user_id, channel_id) VALUES (?, ?)",
+                [(int(k), v) for k, v in data.items()]
+            )
+            imported.append(TICKET_DATA_FILE)
+        data = self._read_legacy(WARN_FILE)
+        if data is not None:
+            self.conn.executemany(
+                "INSERT INTO warns (guild_id, member_id, reason) VALUES (?, ?, ?)",
+                [(g, m, r) for g, members in data.items() for m, reasons in members.items() for r in reasons]
+            )
+            imported.append(WARN_FILE)
+        return imported
+
+    # Blocking, dipakai saat startup / shutdown
+    def call(self, fn, *args):
+        return self.executor.submit(fn, *args).result()
+
+    # Fire-and-forget untuk tulis dari event loop
+    def submit(self, fn, *args):
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self._report_error)
+        return future
+
+    @staticmethod
+    def _report_error(future):
+        if not future.cancelled() and future.exception():
+            log_store.error("Gagal menulis: %s", future.exception())
+
+    def close(self):
+        self.warn_writes.flush()
+        self.call(self.conn.close)
+        self.executor.shutdown(wait=True)
+
+    @Timer(store_latency, "write")
+    def _write(self, sql, params):
+        self.conn.execute(sql, params)
+
+    @Timer(store_latency, "flush")
+    def _write_batch(self, batch):
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for sql, params in batch:
+                self.conn.execute(sql, params)
+
+    def load_tickets(self):
+        return self.call(lambda: self.conn.execute(
+            "SELECT user_id, channel_id, category, created_at FROM tickets"
+        ).fetchall())
+
+    def load_warns(self):
+        return self.call(lambda: self.conn.execute(
+            "SELECT id, guild_id, member_id, reason, moderator_id, created_at, expires_at FROM warns ORDER BY id"
+        ).fetchall())
+
+    def put_ticket(self, user_id, channel_id, category, created_at):
+        return self.submit(
+            self._write,
+            "INSERT OR REPLACE INTO tickets (user_id, channel_id, category, created_at) VALUES (?, ?, ?, ?)",
+            (user_id, channel_id, category, created_at)
+        )
 
-def save_tickets():
-    with open(TICKET_DATA_FILE, "w") as f:
-        json.dump({str(k): v for k, v in active_tickets.items()}, f, indent=4)
+    def delete_ticket(self, user_id):
+        return self.submit(self._write, "DELETE FROM tickets WHERE user_id = ?", (user_id,))
 
-def add_ticket(user_id, channel_id):
-    active_tickets[user_id] = channel_id
-    save_tickets()
+    def insert_warn(self, guild_id, member_id, record):
+        self.warn_writes.add(
+            "INSERT INTO warns (id, guild_id, member_id, reason, moderator_id, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (record.id, guild_id, member_id, record.reason, record.moderator_id, record.created_at, record.expires_at)
+        )
+
+    def delete_warn(self, warn_id):
+        self.warn_writes.add("DELETE FROM warns WHERE id = ?", (warn_id,))
+
+    def delete_expired_warns(self, now):
+        self.warn_writes.add("DELETE FROM warns WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def get_meta(self, key, default=None):
+        row = self.call(lambda: self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone())
+        return row[0] if row else default
+
+    async def get_meta_async(self, key, default=None):
+        row = await asyncio.wrap_future(self.executor.submit(
+            lambda: self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        ))
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        return self.submit(self._write, "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+# Write-behind: mutasi ditandai pending lalu di-flush dalam satu transaksi,
+# jadi latency command tidak ikut nunggu disk. Timer mulai dari mutasi pertama
+# yang pending, jadi data paling lama tertahan `interval` detik.
+class WriteBehindBuffer:
+    def __init__(self, store, interval, max_pending, durability="batched"):
+        self.store = store
+        self.interval = interval
+        self.max_pending = max_pending
+        self.durability = durability
+        self.pending = []
+        self.timer = None
+
+    @property
+    def dirty(self):
+        return bool(self.pending)
+
+    def add(self, sql, params):
+        self.pending.append((sql, params))
+        if self.durability == "sync" or len(self.pending) >= self.max_pending:
+            self.flush()
+        elif self.timer is None:
+            try:
+                self.timer = asyncio.get_running_loop().call_later(self.interval, self.flush)
+            except RuntimeError:
+                self.flush()  # tidak ada event loop (startup / script)
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return None
+        batch, self.pending = self.pending, []
+        return self.store.submit(self.store._write_batch, batch)
 
-def remove_ticket(user_id):
-    if user_id in active_tickets:
-        del active_tickets[user_id]
-        save_tickets()
 
-ticket_count = max(active_tickets.values(), default=0)
+store = BotStore()
+
+# ---------------------------
+# TICKET REGISTRY
+# ---------------------------
+class TicketInfo(NamedTuple):
+    user_id: int
+    channel_id: int
+    category: Optional[str]
+    created_at: Optional[float]
+
+
+# Index dua arah user -> ticket dan channel -> ticket, dua-duanya selalu
+# diupdate bareng dan dibangun ulang dari store saat start.
+class TicketRegistry:
+    def __init__(self, store):
+        self.store = store
+        self.by_user = {}
+        self.by_channel = {}
+        for row in store.load_tickets():
+            self._index(TicketInfo(*row))
+
+    def _index(self, info):
+        self.by_user[info.user_id] = info
+        self.by_channel[info.channel_id] = info
+
+    def __len__(self):
+        return len(self.by_user)
+
+    def __contains__(self, user_id):
+        return user_id in self.by_user
+
+    def get_by_user(self, user_id):
+        return self.by_user.get(user_id)
+
+    def get_by_channel(self, channel_id):
+        return self.by_channel.get(channel_id)
+
+    def is_ticket(self, channel_id):
+        return channel_id in self.by_channel
+
+    def channel_ids(self):
+        return self.by_channel.keys()
+
+    def add(self, user_id, channel_id, category=None):
+        self.remove_user(user_id)
+        info = TicketInfo(user_id, channel_id, category, time.time())
+        self._index(info)
+        self.store.put_ticket(*info)
+        return info
+
+    def remove_user(self, user_id):
+        info = self.by_user.pop(user_id, None)
+        if info is not None:
+            self.by_channel.pop(info.channel_id, None)
+            self.store.delete_ticket(user_id)
+        return info
+
+    def remove_channel(self, channel_id):
+        info = self.by_channel.get(channel_id)
+        if info is not None:
+            self.remove_user(info.user_id)
+        return info
+
+
+# ---------------------------
+# LOAD / SAVE TICKETS & WARNS
+# ---------------------------
+active_tickets = TicketRegistry(store)
+class WarnRecord(NamedTuple):
+    id: int
+    reason: str
+    moderator_id: Optional[int]
+    created_at: Optional[float]
+    expires_at: Optional[float]
+
+    def expired(self, now):
+        return self.expires_at is not None and self.expires_at <= now
+
+
+# warns[guild_id][member_id] = [WarnRecord, ...] (urut dari yang paling lama)
+# warn_expiry = heap (expires_at, warn_id, guild_id, member_id) untuk prune
+warns = {}
+warn_expiry = []
+for warn_id, guild_id, member_id, reason, moderator_id, created_at, expires_at in store.load_warns():
+    warns.setdefault(guild_id, {}).setdefault(member_id, []).append(
+        WarnRecord(warn_id, reason, moderator_id, created_at, expires_at)
+    )
+    if expires_at is not None:
+        warn_expiry.append((expires_at, warn_id, guild_id, member_id))
+heapq.heapify(warn_expiry)
+next_warn_id = 1 + max((w.id for g in warns.values() for ws in g.values() for w in ws), default=0)
+
+# Warn yang sudah kadaluarsa tapi belum kena prune tetap disembunyikan
+def get_warns(guild_id, member_id):
+    now = time.time()
+    return [w for w in warns.get(guild_id, {}).get(member_id, []) if not w.expired(now)]
+
+def add_warn(guild_id, member_id, reason, moderator_id=None, expires_at=None):
+    global next_warn_id
+    record = WarnRecord(next_warn_id, reason, moderator_id, time.time(), expires_at)
+    next_warn_id += 1
+    warns.setdefault(guild_id, {}).setdefault(member_id, []).append(record)
+    if expires_at is not None:
+        heapq.heappush(warn_expiry, (expires_at, record.id, guild_id, member_id))
+    store.insert_warn(guild_id, member_id, record)
+    return len(get_warns(guild_id, member_id))
+
+def _drop_warns(guild_id, member_id, warn_ids):
+    member_warns = warns.get(guild_id, {}).get(member_id)
+    if not member_warns:
+        return
+    member_warns[:] = [w for w in member_warns if w.id not in warn_ids]
+    if not member_warns:
+        warns[guild_id].pop(member_id, None)
+    if not warns[guild_id]:
+        warns.pop(guild_id, None)
+
+# index mulai dari 1, None = warn terakhir
+def remove_warn(guild_id, member_id, index=None):
+    active = get_warns(guild_id, member_id)
+    record = active[-1] if index is None else active[index - 1]
+    _drop_warns(guild_id, member_id, {record.id})
+    store.delete_warn(record.id)
+    return record.reason
+
+def prune_expired_warns(now=None):
+    now = time.time() if now is None else now
+    pruned = 0
+    while warn_expiry and warn_expiry[0][0] <= now:
+        _, warn_id, guild_id, member_id = heapq.heappop(warn_expiry)
+        before = len(warns.get(guild_id, {}).get(member_id, []))
+        _drop_warns(guild_id, member_id, {warn_id})
+        pruned += before - len(warns.get(guild_id, {}).get(member_id, []))
+    if pruned:
+        store.delete_expired_warns(now)
+    return pruned
+
+# Nomor ticket monotonic, disimpan di tabel meta (bukan diturunkan dari id channel)
+ticket_count = int(store.get_meta("ticket_count", 0))
+
+def next_ticket_number():
+    global ticket_count
+    ticket_count += 1
+    store.set_meta("ticket_count", ticket_count)
+    return ticket_count
+
+# ---------------------------
+# RATE LIMIT
+# ---------------------------
+TICKET_RATE_PER_USER = (2, 10 * 60)    # maks 2 ticket per user per 10 menit
+TICKET_RATE_PER_GUILD = (10, 60)       # maks 10 ticket per guild per menit
+
+
+# Token bucket per key (user id / guild id). Bucket yang sudah penuh lagi
+# dibuang saat jumlah key lewat max_keys, jadi memori tidak numpuk.
+class TokenBucket:
+    def __init__(self, capacity, per_seconds, max_keys=10000):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.max_keys = max_keys
+        self.buckets = {}
+
+    def _refill(self, key, now):
+        tokens, last = self.buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - last) * self.rate)
+
+    # Return 0 kalau boleh, selain itu detik yang harus ditunggu
+    def try_acquire(self, key, cost=1):
+        now = time.monotonic()
+        tokens = self._refill(key, now)
+        if tokens < cost:
+            self.buckets[key] = (tokens, now)
+            return (cost - tokens) / self.rate
+        self.buckets[key] = (tokens - cost, now)
+        if len(self.buckets) > self.max_keys:
+            self._prune(now)
+        return 0
+
+    # Kembalikan token kalau aksinya batal / gagal setelah try_acquire
+    def refund(self, key, cost=1):
+        now = time.monotonic()
+        self.buckets[key] = (min(self.capacity, self._refill(key, now) + cost), now)
+
+    def _prune(self, now):
+        for key in [k for k in self.buckets if self._refill(k, now) >= self.capacity]:
+            del self.buckets[key]
+
+
+ticket_user_limiter = TokenBucket(*TICKET_RATE_PER_USER)
+ticket_guild_limiter = TokenBucket(*TICKET_RATE_PER_GUILD)
+ticket_creation_pending = set()   # user yang ticket-nya sedang dibuat
+ticket_closing = set()            # channel ticket yang sedang ditutup
+
+# ---------------------------
+# OUTBOUND
+# ---------------------------
+# Semua kirim ke channel ramai (log ticket, welcome, changelog) lewat antrian
+# per channel. Urutan kirim by prioritas lalu FIFO, jeda diatur TokenBucket
+# sesuai bucket Discord (5 pesan / 5 detik per channel) jadi tidak nunggu 429.
+# Embed log yang `merge=True` dan masih ngantri digabung (maks 10 per pesan).
+OUTBOUND_RATE_PER_CHANNEL = (5, 5)
+OUTBOUND_MAX_EMBEDS = 10
+OUTBOUND_DRAIN_TIMEOUT = 8     # detik nunggu antrian habis saat shutdown (docker stop kasih 10)
+
+PRIORITY_HIGH = 0      # moderasi / balasan ke user
+PRIORITY_NORMAL = 1    # pengumuman, transcript, changelog
+PRIORITY_LOW = 2       # log
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+
+class OutboundMessage(NamedTuple):
+    priority: int
+    seq: int
+    kwargs: dict
+    merge: bool
+    future: asyncio.Future
+    queued_at: float
+
+
+class OutboundScheduler:
+    def __init__(self, rate=OUTBOUND_RATE_PER_CHANNEL, max_embeds=OUTBOUND_MAX_EMBEDS):
+        self.bucket = TokenBucket(*rate)
+        self.max_embeds = max_embeds
+        self.queues = {}     # channel_id -> heap OutboundMessage
+        self.channels = {}
+        self.workers = {}
+        self.seq = 0
+
+    # Return future hasil `channel.send`. Boleh di-await (misal file yang harus
+    # dihapus setelah terkirim) atau dibiarkan, error tetap masuk log.
+    def send(self, channel, *, priority=PRIORITY_NORMAL, merge=False, **kwargs):
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._report_error)
+        self.seq += 1
+        merge = merge and set(kwargs) == {"embed"}
+        queue = self.queues.setdefault(channel.id, [])
+        heapq.heappush(queue, OutboundMessage(priority, self.seq, kwargs, merge, future, time.monotonic()))
+        self.channels[channel.id] = channel
+        if channel.id not in self.workers:
+            self.workers[channel.id] = asyncio.create_task(self._run(channel.id))
+        return future
+
+    @staticmethod
+    def _report_error(future):
+        if not future.cancelled() and future.exception():
+            log.error("Gagal kirim pesan: %s", future.exception())
+
+    def pending(self, channel_id=None):
+        if channel_id is not None:
+            return len(self.queues.get(channel_id, ()))
+        return sum(len(q) for q in self.queues.values())
+
+    # Tunggu semua worker selesai kirim (transcript / arsip yang masih antri),
+    # maks `timeout` detik, sebelum stop()
+    async def drain(self, timeout=OUTBOUND_DRAIN_TIMEOUT):
+        if self.workers:
+            await asyncio.wait(list(self.workers.values()), timeout=timeout)
+        if self.pending():
+            log.warning("%d pesan outbound belum terkirim saat shutdown.", self.pending())
+
+    def stop(self):
+        for task in self.workers.values():
+            task.cancel()
+        self.workers.clear()
+        for queue in self.queues.values():
+            for item in queue:
+                item.future.cancel()
+        self.queues.clear()
+
+    def _take_batch(self, queue):
+        first = heapq.heappop(queue)
+        if not first.merge:
+            return [first]
+        batch = [first]
+        rest = []
+        for item in sorted(queue):
+            if item.merge and len(batch) < self.max_embeds:
+                batch.append(item)
+            else:
+                rest.append(item)
+        if len(rest) != len(queue):
+            queue[:] = rest
+            heapq.heapify(queue)
+        return batch
+
+    async def _run(self, channel_id):
+        queue = self.queues[channel_id]
+        try:
+            while queue:
+                wait = self.bucket.try_acquire(channel_id)
+                if wait:
+                    await asyncio.sleep(wait)
+                    continue
+                batch = [item for item in self._take_batch(queue) if not item.future.done()]
+                if not batch:
+                    continue
+                now = time.monotonic()
+                for item in batch:
+                    outbound_wait.observe(now - item.queued_at, PRIORITY_NAMES[item.priority])
+                if len(batch) > 1:
+                    kwargs = {"embeds": [item.kwargs["embed"] for item in batch]}
+                else:
+                    kwargs = batch[0].kwargs
+                try:
+                    message = await self.channels[channel_id].send(**kwargs)
+                except Exception as e:
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+                else:
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_result(message)
+        finally:
+            if self.workers.get(channel_id) is asyncio.current_task():
+                del self.workers[channel_id]
+            if not queue:
+                self.queues.pop(channel_id, None)
+                self.channels.pop(channel_id, None)
+
+
+outbound = OutboundScheduler()
 
 # ---------------------------
 # EMBEDS
@@ -93,17 +866,17 @@ async def send_ticket_panel(bot: commands.Bot, panel_type="all"):
     for panel in panels:
         channel = bot.get_channel(panel["channel_id"])
         if not channel:
-            print(f"[PANEL] Channel {panel['channel_id']} tidak ditemukan.")
+            log_panels.warning("Channel %s tidak ditemukan.", panel["channel_id"])
             continue
         try:
             msg = await channel.fetch_message(panel["message_id"])
             await msg.edit(embed=panel["embed"], view=panel["view"])
-            print(f"[PANEL] Message {panel['message_id']} berhasil di-edit.")
+            log_panels.info("Message %s berhasil di-edit.", panel["message_id"])
         except dc.NotFound:
             await channel.send(embed=panel["embed"], view=panel["view"])
-            print(f"[PANEL] Message {panel['message_id']} tidak ditemukan, baru dibuat.")
+            log_panels.info("Message %s tidak ditemukan, baru dibuat.", panel["message_id"])
         except Exception as e:
-            print(f"[PANEL] Gagal edit/send message {panel['message_id']}: {e}")
+            log_panels.error("Gagal edit/send message %s: %s", panel["message_id"], e)
 
 TICKET_BIASA_DESC = """\
 **Ticket Explanation**
@@ -139,6 +912,500 @@ Yuk ikut event server boost X8 biar peluang dapet ikan rare makin besar 💎
 ⚡ Ayo isi slotmu sebelum penuh
 """
 
+# ---------------------------
+# TRANSCRIPT
+# ---------------------------
+TRANSCRIPT_FORMAT = "html"               # "txt" | "html" | "jsonl"
+TRANSCRIPT_PAGE_SIZE = 100               # sama dengan page size history API
+TRANSCRIPT_UPLOAD_LIMIT = 8 * 1024 * 1024
+
+# Opt-in: pesan di channel ticket langsung dicatat ke TRANSCRIPT_DIR/<channel_id>.jsonl,
+# jadi saat close tinggal finalize + upload (history cuma dipakai untuk nambal gap).
+LIVE_TRANSCRIPT_CAPTURE = False
+TRANSCRIPT_DIR = os.path.join(BASE_DIR, "transcripts")
+
+# URL attachment di CDN Discord kadaluarsa, jadi saat close semua attachment
+# ticket didownload ke ATTACHMENT_DIR (nama file = sha256 isinya, file sama
+# cuma disimpan sekali) lalu dibundel jadi .tar.gz ke TICKET_LOG_CHANNEL_ID.
+ARCHIVE_ATTACHMENTS = True
+ATTACHMENT_DIR = os.path.join(BASE_DIR, "attachments")
+ATTACHMENT_DOWNLOAD_WORKERS = 4
+ATTACHMENT_ARCHIVE_PART_SIZE = TRANSCRIPT_UPLOAD_LIMIT - 512 * 1024   # sisa untuk buffer gzip + manifest
+ATTACHMENT_MAX_SIZE = ATTACHMENT_ARCHIVE_PART_SIZE                   # lebih besar dari ini di-skip
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+ATTACHMENT_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=30)
+ATTACHMENT_URL_MARGIN = 5 * 60           # URL yang kadaluarsa < 5 menit lagi ikut di-refresh
+
+
+def message_to_record(msg):
+    return {
+        "id": msg.id,
+        "author": str(msg.author),
+        "author_id": msg.author.id,
+        "created_at": msg.created_at.isoformat(),
+        "content": msg.content,
+        "attachments": [
+            {"id": a.id, "filename": a.filename, "url": a.url, "size": a.size}
+            for a in msg.attachments
+        ],
+    }
+
+
+def format_record_time(record):
+    return datetime.datetime.fromisoformat(record["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Writer transcript nulis per record langsung ke file, jadi memori tidak ikut
+# membesar walaupun ticket-nya puluhan ribu pesan. Subclass wajib isi
+# `extension` dan write_record.
+class TranscriptWriter(ABC):
+    extension = None
+
+    def __init__(self, fp, channel_name):
+        self.fp = fp
+        self.channel_name = channel_name
+        self.count = 0
+        self.attachments = []
+
+    def write_header(self):
+        pass
+
+    @abstractmethod
+    def write_record(self, record):
+        pass
+
+    def write_footer(self):
+        pass
+
+    def write_many(self, records):
+        for record in records:
+            self.write_record(record)
+            self.count += 1
+            for a in record["attachments"]:
+                self.attachments.append(dict(a, message_id=record["id"], author=record["author"]))
+
+
+class TextTranscriptWriter(TranscriptWriter):
+    extension = "txt"
+
+    def write_header(self):
+        self.fp.write(f"Transcript — {self.channel_name}\n\n")
+
+    def write_record(self, record):
+        content = record["content"] or "[Tidak ada teks]"
+        for a in record["attachments"]:
+            content += f"\n[Attachment] {a['url']}"
+        self.fp.write(f"{record['author']} [{format_record_time(record)}]:\n{content}\n\n")
+
+
+class HtmlTranscriptWriter(TranscriptWriter):
+    extension = "html"
+
+    def write_header(self):
+        title = html.escape(f"Transcript — {self.channel_name}")
+        self.fp.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>{title}</title>"
+            "<style>body{font-family:sans-serif;background:#313338;color:#dbdee1}"
+            ".msg{margin:8px 0}.author{font-weight:bold;color:#fff}.ts{color:#949ba4;font-size:12px}"
+            ".content{white-space:pre-wrap}a{color:#00a8fc}</style>"
+            f"</head><body><h2>{title}</h2>\n"
+        )
+
+    def write_record(self, record):
+        content = html.escape(record["content"]) if record["content"] else "<i>[Tidak ada teks]</i>"
+        attachments = "".join(
+            f'<div><a href="{html.escape(a["url"])}">{html.escape(a["filename"])}</a></div>'
+            for a in record["attachments"]
+        )
+        self.fp.write(
+            f'<div class="msg"><span class="author">{html.escape(record["author"])}</span> '
+            f'<span class="ts">{format_record_time(record)}</span>'
+            f'<div class="content">{content}</div>{attachments}</div>\n'
+        )
+
+    def write_footer(self):
+        self.fp.write("</body></html>\n")
+
+
+class JsonlTranscriptWriter(TranscriptWriter):
+    extension = "jsonl"
+
+    def write_record(self, record):
+        self.fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+TRANSCRIPT_WRITERS = {
+    "txt": TextTranscriptWriter,
+    "html": HtmlTranscriptWriter,
+    "jsonl": JsonlTranscriptWriter,
+}
+
+
+# History di-stream per page dan tiap page ditulis di thread, hasilnya satu file
+# di disk. Return (path, jumlah pesan, nama file untuk upload, list attachment).
+# Kalau live_log dikasih, transcript dibuat dari log live (setelah gap-nya ditambal).
+@Timer(ticket_latency, "transcript_export")
+async def export_transcript(channel, fmt=TRANSCRIPT_FORMAT, live_log=None):
+    writer_cls = TRANSCRIPT_WRITERS[fmt]
+    fd, path = tempfile.mkstemp(prefix=f"{channel.name}-", suffix=f".{writer_cls.extension}")
+    fp = os.fdopen(fd, "w", encoding="utf-8")
+    writer = writer_cls(fp, channel.name)
+    try:
+        await asyncio.to_thread(writer.write_header)
+        if live_log is not None:
+            await live_log.backfill(channel)
+            await live_log.run(writer.write_many, live_log.iter_records(channel.id))
+        else:
+            page = []
+            async for msg in channel.history(limit=None, oldest_first=True):
+                page.append(message_to_record(msg))
+                if len(page) >= TRANSCRIPT_PAGE_SIZE:
+                    await asyncio.to_thread(writer.write_many, page)
+                    page = []
+            if page:
+                await asyncio.to_thread(writer.write_many, page)
+        await asyncio.to_thread(writer.write_footer)
+    except BaseException:
+        fp.close()
+        os.remove(path)
+        raise
+    fp.close()
+
+    filename = f"{channel.name}.{writer_cls.extension}"
+    if os.path.getsize(path) > TRANSCRIPT_UPLOAD_LIMIT:
+        path = await asyncio.to_thread(gzip_file, path)
+        filename += ".gz"
+    return path, writer.count, filename, writer.attachments
+
+
+def gzip_file(path):
+    gz_path = path + ".gz"
+    with open(path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(path)
+    return gz_path
+
+
+# Download jalan di ATTACHMENT_DOWNLOAD_WORKERS task, tiap file di-stream per chunk
+# ke file temp sambil di-hash, lalu di-rename ke <dir>/<sha[:2]>/<sha>. Bundle
+# tar.gz dibuat di thread dari file di disk, dipecah per ATTACHMENT_ARCHIVE_PART_SIZE
+# supaya tiap part muat di limit upload.
+class AttachmentArchiver:
+    def __init__(self, directory=ATTACHMENT_DIR, workers=ATTACHMENT_DOWNLOAD_WORKERS):
+        self.directory = directory
+        self.workers = workers
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _store(self, tmp_path, digest):
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return True
+
+    async def download(self, session, attachment):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="dl-", dir=self.directory)
+        fp = os.fdopen(fd, "wb")
+        sha = hashlib.sha256()
+        size = 0
+        try:
+            async with session.get(attachment["url"], timeout=ATTACHMENT_TIMEOUT) as resp:
+                if resp.status == 429:
+                    rate_limit_hits.inc("attachment_cdn")
+                resp.raise_for_status()
+                async for chunk in resp.content.iter_chunked(ATTACHMENT_CHUNK_SIZE):
+                    sha.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(fp.write, chunk)
+        except BaseException:
+            fp.close()
+            os.remove(tmp_path)
+            raise
+        fp.close()
+        digest = sha.hexdigest()
+        await asyncio.to_thread(self._store, tmp_path, digest)
+        return dict(attachment, sha256=digest, size=size)
+
+    async def download_all(self, session, attachments):
+        pending = asyncio.Queue()
+        for a in attachments:
+            pending.put_nowait(a)
+        stored, missing = [], []
+
+        async def worker():
+            while not pending.empty():
+                a = pending.get_nowait()
+                try:
+                    stored.append(await self.download(session, a))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    log_tickets.warning("Gagal download attachment %s: %s", a["url"], e)
+                    missing.append(dict(a, error=str(e)))
+
+        # Error selain network (disk penuh dll) membatalkan worker lain juga,
+        # jangan sampai masih download di background
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.workers, len(attachments)))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        return stored, missing
+
+    def _build_parts(self, name, entries, missing):
+        parts = []
+        raw = gz = tar = None
+        manifest = []
+
+        def close_part():
+            data = json.dumps({"files": manifest, "missing": missing}, ensure_ascii=False, indent=2).encode()
+            info = tarfile.TarInfo("manifest.json")
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+            tar.close()
+            gz.close()
+            raw.close()
+
+        try:
+            for entry in entries:
+                if tar is None or (manifest and raw.tell() + entry["size"] > ATTACHMENT_ARCHIVE_PART_SIZE):
+                    if tar is not None:
+                        close_part()
+                    fd, path = tempfile.mkstemp(prefix=f"{name}-", suffix=".tar.gz")
+                    raw = os.fdopen(fd, "wb")
+                    parts.append(path)
+                    gz = gzip.GzipFile(fileobj=raw, mode="wb")
+                    tar = tarfile.open(fileobj=gz, mode="w")
+                    manifest = []
+                arcname = f"{entry['message_id']}-{entry['id']}-{os.path.basename(entry['filename'])}"
+                tar.add(self.object_path(entry["sha256"]), arcname=arcname)
+                manifest.append(dict(entry, path=arcname))
+            if tar is not None:
+                close_part()
+        except BaseException:
+            if raw is not None:
+                raw.close()
+            for path in parts:
+                os.remove(path)
+            raise
+        return parts
+
+    # Return (list path .tar.gz, attachment yang tersimpan, attachment yang
+    # gagal / di-skip). List path kosong kalau tidak ada yang berhasil didownload.
+    @Timer(ticket_latency, "attachment_archive")
+    async def archive(self, session, name, attachments):
+        unique, missing = {}, []
+        for a in attachments:
+            if a["size"] > ATTACHMENT_MAX_SIZE:
+                missing.append(dict(a, error="terlalu besar"))
+            else:
+                unique.setdefault(a["id"], a)
+        if not unique:
+            return [], [], missing
+        stored, failed = await self.download_all(session, list(unique.values()))
+        missing += failed
+        stored.sort(key=lambda a: (a["message_id"], a["id"]))
+        parts = await asyncio.to_thread(self._build_parts, name, stored, missing)
+        return parts, stored, missing
+
+
+# URL CDN punya parameter ex=<unix time hex>. Dipakai untuk attachment dari log
+# live, yang URL-nya dicatat saat pesan masuk dan bisa sudah kadaluarsa saat close.
+def attachment_url_expired(url, margin=ATTACHMENT_URL_MARGIN):
+    ex = parse_qs(urlsplit(url).query).get("ex")
+    if not ex:
+        return True
+    try:
+        return int(ex[0], 16) <= time.time() + margin
+    except ValueError:
+        return True
+
+
+# Pesan yang attachment-nya kadaluarsa di-fetch ulang (satu request per pesan)
+# dan URL-nya diganti di tempat. Pesan yang sudah dihapus dibiarkan, nanti
+# masuk "missing" di manifest.
+async def refresh_attachment_urls(channel, attachments):
+    stale = {}
+    for a in attachments:
+        if attachment_url_expired(a["url"]):
+            stale.setdefault(a["message_id"], []).append(a)
+    for message_id, items in stale.items():
+        try:
+            msg = await channel.fetch_message(message_id)
+        except dc.NotFound:
+            continue
+        except dc.HTTPException as e:
+            log_tickets.warning("Gagal refresh URL attachment pesan %s: %s", message_id, e)
+            continue
+        urls = {a.id: a.url for a in msg.attachments}
+        for a in items:
+            if a["id"] in urls:
+                a["url"] = urls[a["id"]]
+    if stale:
+        log_tickets.info("URL attachment %d pesan di-refresh sebelum download.", len(stale))
+
+
+# Gagal arsip (disk penuh, tar error, upload gagal) cuma di-log + dilaporkan
+# ke log channel, close ticket tetap lanjut hapus channel.
+async def send_attachment_archive(guild, channel, session, archiver, attachments, closed_by):
+    log = guild.get_channel(TICKET_LOG_CHANNEL_ID)
+    try:
+        parts, stored, missing = await archiver.archive(session, channel.name, attachments)
+    except Exception as e:
+        log_tickets.error("Gagal membuat arsip attachment %s: %s", channel.name, e)
+        embed = dc.Embed(
+            title=f"📎 Attachment — {channel.name}",
+            description=f"❌ Arsip **{len(attachments)}** attachment gagal dibuat: `{e}`",
+            color=VORA_BLUE
+        )
+        embed.set_footer(text=f"Ditutup oleh {closed_by}")
+        try:
+            await outbound.send(log, embed=embed)
+        except dc.HTTPException as e:
+            log_tickets.error("Gagal kirim laporan arsip %s: %s", channel.name, e)
+        return
+    try:
+        for i, path in enumerate(parts, start=1):
+            suffix = f"-part{i}" if len(parts) > 1 else ""
+            embed = dc.Embed(
+                title=f"📎 Attachment — {channel.name}",
+                description=(
+                    f"**Jumlah attachment:** {len(stored)}"
+                    + (f"\n**Gagal / di-skip:** {len(missing)} (lihat manifest.json)" if missing else "")
+                    + (f"\n**Part:** {i}/{len(parts)}" if len(parts) > 1 else "")
+                ),
+                color=VORA_BLUE
+            )
+            embed.set_footer(text=f"Ditutup oleh {closed_by}")
+            await outbound.send(log, embed=embed, file=dc.File(path, filename=f"{channel.name}-attachments{suffix}.tar.gz"))
+    except dc.HTTPException as e:
+        log_tickets.error("Gagal upload arsip attachment %s: %s", channel.name, e)
+    finally:
+        for path in parts:
+            os.remove(path)
+
+
+# Append-only log per ticket. Semua operasi file lewat satu worker thread supaya
+# urutan append/baca tetap serial, dan per channel ada lock supaya backfill dan
+# pesan live tidak saling dobel (record cuma ditulis kalau id > id terakhir).
+class LiveTranscriptLog:
+    def __init__(self, directory=TRANSCRIPT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcript-log")
+        self.last_ids = {}
+        self.locks = {}
+        # Channel yang log-nya sudah di-discard (ticket ditutup). Pesan yang masih
+        # masuk sebelum channel benar-benar dihapus tidak boleh bikin file baru.
+        self.closed = set()
+
+    def path_for(self, channel_id):
+        return os.path.join(self.directory, f"{channel_id}.jsonl")
+
+    def run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def _lock(self, channel_id):
+        lock = self.locks.get(channel_id)
+        if lock is None:
+            lock = self.locks[channel_id] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _read_last_id(path):
+        last_id = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        last_id = json.loads(line)["id"]
+        return last_id
+
+    @staticmethod
+    def _append(path, records):
+        with open(path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def _remove(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def _last_id(self, channel_id):
+        if channel_id not in self.last_ids:
+            self.last_ids[channel_id] = await self.run(self._read_last_id, self.path_for(channel_id))
+        return self.last_ids[channel_id]
+
+    def iter_records(self, channel_id):
+        path = self.path_for(channel_id)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+
+    async def append(self, message):
+        channel_id = message.channel.id
+        if channel_id in self.closed:
+            return
+        async with self._lock(channel_id):
+            if channel_id in self.closed:
+                return
+            last_id = await self._last_id(channel_id)
+            if last_id is None:
+                # Belum ada log (capture baru dinyalakan): ambil semua dari awal
+                await self._backfill(message.channel, None)
+                return
+            if message.id <= last_id:
+                return
+            self.last_ids[channel_id] = message.id
+            await self.run(self._append, self.path_for(channel_id), [message_to_record(message)])
+
+    # Dipanggil saat export transcript. Kalau close sebelumnya gagal setelah
+    # discard (channel tidak jadi dihapus), log dibangun ulang dari history.
+    async def backfill(self, channel):
+        self.closed.discard(channel.id)
+        async with self._lock(channel.id):
+            return await self._backfill(channel, await self._last_id(channel.id))
+
+    async def _backfill(self, channel, last_id):
+        path = self.path_for(channel.id)
+        after = dc.Object(id=last_id) if last_id else None
+        count = 0
+        page = []
+        async for msg in channel.history(limit=None, after=after, oldest_first=True):
+            page.append(message_to_record(msg))
+            if len(page) >= TRANSCRIPT_PAGE_SIZE:
+                await self.run(self._append, path, page)
+                self.last_ids[channel.id] = page[-1]["id"]
+                count += len(page)
+                page = []
+        if page:
+            await self.run(self._append, path, page)
+            self.last_ids[channel.id] = page[-1]["id"]
+            count += len(page)
+        return count
+
+    async def discard(self, channel_id):
+        self.closed.add(channel_id)
+        async with self._lock(channel_id):
+            await self.run(self._remove, self.path_for(channel_id))
+            self.last_ids.pop(channel_id, None)
+        self.locks.pop(channel_id, None)
+
 # ---------------------------
 # VIEWS
 # ---------------------------
@@ -147,14 +1414,17 @@ class TicketPanelButtons(ui.View):
         super().__init__(timeout=None)
 
     @ui.button(emoji="🏛️", label="Purchase", style=dc.ButtonStyle.green, custom_id="ticket_premium")
+    @timed_view_callback
     async def premium(self, interaction: Interaction, button: ui.Button):
         await create_ticket(interaction, "Premium Purchase")
 
     @ui.button(emoji="🎥", label="Content Creator", style=dc.ButtonStyle.red, custom_id="ticket_creator")
+    @timed_view_callback
     async def creator(self, interaction: Interaction, button: ui.Button):
         await create_ticket(interaction, "Content Creator Request")
 
     @ui.button(emoji="📬", label="Report", style=dc.ButtonStyle.blurple, custom_id="ticket_report")
+    @timed_view_callback
     async def report(self, interaction: Interaction, button: ui.Button):
         await create_ticket(interaction, "Bug / Misconduct Report")
 
@@ -163,6 +1433,7 @@ class TicketX8Button(ui.View):
         super().__init__(timeout=None)
 
     @ui.button(label="🚀 Register Event", style=dc.ButtonStyle.green, custom_id="ticket_x8")
+    @timed_view_callback
     async def create_ticket_button(self, interaction: Interaction, button: ui.Button):
         await create_ticket(interaction, "X8 Ticket")
 
@@ -184,6 +1455,7 @@ class TicketControlView(ui.View):
             return await self.pay_now_callback(interaction)
         return True
 
+    @timed_view_callback
     async def close_ticket_callback(self, interaction: Interaction):
         user = interaction.user
         guild = interaction.guild
@@ -193,33 +1465,14 @@ class TicketControlView(ui.View):
         if staff_role and helper_role not in user.roles:
             await interaction.response.send_message("❌ Hanya staff yang bisa menutup ticket.", ephemeral=True)
             return False
+        if interaction.channel.id in ticket_closing:
+            await interaction.response.send_message("⏳ Ticket ini sedang ditutup.", ephemeral=True)
+            return False
 
-        channel = interaction.channel
         await interaction.response.send_message("📁 Membuat transcript…", ephemeral=True)
-        messages = []
-        async for msg in channel.history(limit=None, oldest_first=True):
-            ts = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            content = msg.content or "*[Tidak ada teks]*"
-            if msg.attachments:
-                content += "\n" + "\n".join([f"[Attachment] {a.url}" for a in msg.attachments])
-            messages.append(f"**{msg.author}** [{ts}]:\n{content}\n")
-
-        transcript = "\n".join(messages)
-        log = guild.get_channel(TICKET_LOG_CHANNEL_ID)
-        for i in range(0, len(transcript), 4096):
-            part = transcript[i:i+4096]
-            embed = dc.Embed(title=f"📝 Transcript — {channel.name}", description=part, color=VORA_BLUE)
-            await log.send(embed=embed)
-        await log.send(f"✅ Transcript ticket **{channel.name}** selesai.")
-
-        # Remove from active tickets
-        for uid, cid in list(active_tickets.items()):
-            if cid == channel.id:
-                del active_tickets[uid]
-        save_tickets()
-        await channel.delete()
-        return True
+        return await close_ticket(interaction.client, interaction.channel, user)
 
+    @timed_view_callback
     async def pay_now_callback(self, interaction: Interaction):
         if not self.is_premium:
             await interaction.response.send_message("❌ Tidak ada pembayaran di ticket ini.", ephemeral=True)
@@ -233,10 +1486,12 @@ class PaymentActionView(ui.View):
         super().__init__(timeout=None)
 
     @ui.button(label="📤 Send Proof", style=dc.ButtonStyle.green)
+    @timed_view_callback
     async def send_proof(self, interaction: Interaction, button: ui.Button):
         await interaction.response.send_message("Silakan **upload bukti transfer** di chat ticket ini.", ephemeral=True)
 
     @ui.button(label="💳 Open QRIS", style=dc.ButtonStyle.blurple)
+    @timed_view_callback
     async def open_qris(self, interaction: Interaction, button: ui.Button):
         await interaction.response.send_message(
             "🧾 **QRIS Payment:**\nhttps://cdn.discordapp.com/attachments/1436968124699119636/1443793945581846619/VoraQris.png",
@@ -260,37 +1515,72 @@ async def send_payment_embed(channel):
 # ---------------------------
 # CREATE TICKET FUNCTION
 # ---------------------------
+@Timer(ticket_latency, "create")
 async def create_ticket(interaction: Interaction, category_name: str):
-    global ticket_count
     user = interaction.user
     guild = interaction.guild
 
     # Cek ticket aktif
-    if user.id in active_tickets:
-        ch = guild.get_channel(active_tickets[user.id])
+    existing = active_tickets.get_by_user(user.id)
+    if existing:
+        ch = guild.get_channel(existing.channel_id)
         ch_mention = ch.mention if ch else "tidak ditemukan"
         return await interaction.response.send_message(
             f"⚠ Kamu masih punya ticket aktif di {ch_mention}.", ephemeral=True
         )
 
-    ticket_count += 1
-    category_id = TICKET_CATEGORY_ID_X8 if "x8" in category_name.lower() else TICKET_CATEGORY_ID
-    category = guild.get_channel(category_id)
-    staff_role = guild.get_role(STAFF_ROLE_ID)
-    helper_role = guild.get_role(HELPER_ROLE_ID)
-    channel_name = f"{'x8-' if 'x8' in category_name.lower() else ''}ticket-{ticket_count:04}"
-
-    ticket_channel = await guild.create_text_channel(
-        name=channel_name,
-        category=category,
-        overwrites={
-            guild.default_role: dc.PermissionOverwrite(view_channel=False),
-            user: dc.PermissionOverwrite(view_channel=True, send_messages=True),
-            staff_role: dc.PermissionOverwrite(view_channel=True, send_messages=True),
-            helper_role: dc.PermissionOverwrite(view_channel=True, send_messages=True)
-        }
-    )
-    add_ticket(user.id, ticket_channel.id)
+    # Double click: ticket pertama masih dibuat
+    if user.id in ticket_creation_pending:
+        return await interaction.response.send_message(
+            "⏳ Ticket kamu sedang dibuat, tunggu sebentar.", ephemeral=True
+        )
+
+    # Bucket user dulu: klik yang ditolak limit per user tidak boleh memakan
+    # jatah guild, dan yang ditolak guild tidak memakan jatah user
+    retry_after = ticket_user_limiter.try_acquire(user.id)
+    if not retry_after:
+        retry_after = ticket_guild_limiter.try_acquire(guild.id)
+        if retry_after:
+            ticket_user_limiter.refund(user.id)
+    if retry_after:
+        return await interaction.response.send_message(
+            f"⚠ Terlalu banyak ticket dibuat, coba lagi dalam {int(retry_after) + 1} detik.", ephemeral=True
+        )
+
+    # Dari sini sampai active_tickets.add tidak boleh ada await sebelum
+    # user masuk ticket_creation_pending, supaya check + reserve atomic.
+    ticket_creation_pending.add(user.id)
+    try:
+        # Ack dulu supaya tidak "interaction failed", sisanya lewat followup
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        number = next_ticket_number()
+        category_id = TICKET_CATEGORY_ID_X8 if "x8" in category_name.lower() else TICKET_CATEGORY_ID
+        category = guild.get_channel(category_id)
+        staff_role = guild.get_role(STAFF_ROLE_ID)
+        helper_role = guild.get_role(HELPER_ROLE_ID)
+        channel_name = f"{'x8-' if 'x8' in category_name.lower() else ''}ticket-{number:04}"
+
+        ticket_channel = await guild.create_text_channel(
+            name=channel_name,
+            category=category,
+            overwrites={
+                guild.default_role: dc.PermissionOverwrite(view_channel=False),
+                user: dc.PermissionOverwrite(view_channel=True, send_messages=True),
+                staff_role: dc.PermissionOverwrite(view_channel=True, send_messages=True),
+                helper_role: dc.PermissionOverwrite(view_channel=True, send_messages=True)
+            }
+        )
+        # Persist jalan di thread store, tidak perlu ditunggu
+        active_tickets.add(user.id, ticket_channel.id, category_name)
+        interaction.client.ticket_sweeper.track(ticket_channel.id)
+    except dc.HTTPException as e:
+        log_tickets.error("Gagal membuat ticket untuk %s: %s", user, e)
+        # Ticket tidak jadi dibuat, jadi tidak dihitung ke limit
+        ticket_guild_limiter.refund(guild.id)
+        ticket_user_limiter.refund(user.id)
+        return await interaction.followup.send("❌ Gagal membuat ticket, coba lagi nanti.", ephemeral=True)
+    finally:
+        ticket_creation_pending.discard(user.id)
 
     is_premium = "premium" in category_name.lower()
 
@@ -314,22 +1604,201 @@ async def create_ticket(interaction: Interaction, category_name: str):
     if helper_role:
         mentions.append(helper_role.mention)
 
-    await ticket_channel.send(
-        content=" ".join(mentions),
-        embed=embed,
-        view=TicketControlView(is_premium=is_premium)
+    # Konfirmasi, greeting dan log tidak saling bergantung: kirim barengan,
+    # satu gagal tidak membatalkan yang lain.
+    results = await asyncio.gather(
+        interaction.followup.send(f"🎫 Ticket kamu sudah dibuat: {ticket_channel.mention}", ephemeral=True),
+        ticket_channel.send(
+            content=" ".join(mentions),
+            embed=embed,
+            view=TicketControlView(is_premium=is_premium)
+        ),
+        send_ticket_log(guild, user, category_name, ticket_channel),
+        return_exceptions=True
     )
+    for step, result in zip(("konfirmasi", "greeting", "log"), results):
+        if isinstance(result, Exception):
+            log_tickets.error("Gagal kirim %s untuk %s: %s", step, ticket_channel.name, result)
 
-    await interaction.response.send_message(f"🎫 Ticket kamu sudah dibuat: {ticket_channel.mention}", ephemeral=True)
-
+async def send_ticket_log(guild, user, category_name, ticket_channel):
     log = guild.get_channel(TICKET_LOG_CHANNEL_ID)
+    if not log:
+        return
     log_embed = dc.Embed(
         title="📩 Ticket Dibuat",
         description=f"**User:** {user.mention}\n**Kategori:** {category_name}\n\n📌 **Channel:** {ticket_channel.mention}",
         color=VORA_BLUE
     )
     log_embed.set_footer(text="Vora Hub Ticket System • Ticket Log")
-    await log.send(embed=log_embed)
+    # Tidak ditunggu: saat ramai log digabung dengan log lain yang masih ngantri
+    outbound.send(log, embed=log_embed, priority=PRIORITY_LOW, merge=True)
+
+# ---------------------------
+# CLOSE TICKET
+# ---------------------------
+# Dipakai tombol "Close Ticket" dan auto-close ticket yang tidak aktif:
+# transcript + arsip attachment ke log, lalu channel dihapus.
+@Timer(ticket_latency, "close")
+async def close_ticket(bot, channel, closed_by):
+    if channel.id in ticket_closing:
+        return False
+    ticket_closing.add(channel.id)
+    try:
+        guild = channel.guild
+        live_log = bot.live_transcripts
+        path, count, filename, attachments = await export_transcript(channel, live_log=live_log)
+        try:
+            log = guild.get_channel(TICKET_LOG_CHANNEL_ID)
+            embed = dc.Embed(
+                title=f"📝 Transcript — {channel.name}",
+                description=f"✅ Transcript ticket **{channel.name}** selesai.\n**Jumlah pesan:** {count}",
+                color=VORA_BLUE
+            )
+            embed.set_footer(text=f"Ditutup oleh {closed_by}")
+            await outbound.send(log, embed=embed, file=dc.File(path, filename=filename))
+        finally:
+            os.remove(path)
+        # Harus sebelum channel dihapus, attachment channel yang dihapus ikut hilang dari CDN
+        if attachments and bot.attachment_archiver is not None:
+            if live_log is not None:
+                await refresh_attachment_urls(channel, attachments)
+            await send_attachment_archive(guild, channel, bot.session, bot.attachment_archiver, attachments, closed_by)
+        if live_log is not None:
+            await live_log.discard(channel.id)
+
+        # Remove from active tickets
+        active_tickets.remove_channel(channel.id)
+        bot.ticket_sweeper.forget(channel.id)
+        await channel.delete()
+        return True
+    finally:
+        ticket_closing.discard(channel.id)
+
+# ---------------------------
+# TICKET INACTIVITY
+# ---------------------------
+# Aktivitas terakhir per ticket cuma di-update di dict saat on_message (O(1)).
+# Deadline disimpan di timing wheel; tiap tick cuma slot yang jatuh tempo yang
+# dicek, dan kalau ternyata ada aktivitas baru, ticket dijadwalkan ulang ke
+# deadline barunya. Jadi biaya per tick tidak tergantung jumlah ticket terbuka.
+TICKET_IDLE_WARN_HOURS = 48      # tidak ada pesan selama ini -> diperingatkan
+TICKET_IDLE_CLOSE_HOURS = 24     # setelah peringatan, tetap sepi -> ditutup
+TICKET_IDLE_TICK = 60            # detik per slot wheel
+TICKET_IDLE_WHEEL_SLOTS = 1024   # ~17 jam per putaran dengan tick 60 detik
+TICKET_IDLE_RETRY = 10 * 60      # detik, coba lagi kalau auto-close gagal / bentrok close manual
+
+
+class TimingWheel:
+    def __init__(self, slots=TICKET_IDLE_WHEEL_SLOTS, tick=TICKET_IDLE_TICK):
+        self.tick = tick
+        self.slots = [set() for _ in range(slots)]
+        self.current = 0
+        self.due = {}            # key -> nomor tick jatuh tempo
+
+    def __len__(self):
+        return len(self.due)
+
+    def __contains__(self, key):
+        return key in self.due
+
+    def schedule(self, key, delay):
+        self.cancel(key)
+        due = self.current + max(1, math.ceil(delay / self.tick))
+        self.due[key] = due
+        self.slots[due % len(self.slots)].add(key)
+
+    def cancel(self, key):
+        due = self.due.pop(key, None)
+        if due is not None:
+            self.slots[due % len(self.slots)].discard(key)
+
+    # Maju satu tick, return key yang jatuh tempo. Key di slot yang sama tapi
+    # putaran berikutnya tetap di tempat.
+    def advance(self):
+        self.current += 1
+        slot = self.slots[self.current % len(self.slots)]
+        expired = [key for key in slot if self.due[key] <= self.current]
+        for key in expired:
+            slot.discard(key)
+            del self.due[key]
+        return expired
+
+
+class TicketIdleSweeper:
+    def __init__(self, bot, warn_after=TICKET_IDLE_WARN_HOURS * 3600, close_after=TICKET_IDLE_CLOSE_HOURS * 3600):
+        self.bot = bot
+        self.warn_after = warn_after
+        self.close_after = close_after
+        self.wheel = TimingWheel()
+        self.last_activity = {}  # channel id -> time.time()
+        self.warned = {}         # channel id -> waktu peringatan
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def track(self, channel_id, last_activity=None):
+        self.last_activity[channel_id] = last_activity or time.time()
+        self.wheel.schedule(channel_id, self.last_activity[channel_id] + self.warn_after - time.time())
+
+    def touch(self, channel_id):
+        if channel_id in self.last_activity:
+            self.last_activity[channel_id] = time.time()
+            self.warned.pop(channel_id, None)
+
+    def forget(self, channel_id):
+        self.wheel.cancel(channel_id)
+        self.last_activity.pop(channel_id, None)
+        self.warned.pop(channel_id, None)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            for channel_id in self.wheel.advance():
+                try:
+                    await self.check(channel_id)
+                except Exception as e:
+                    log_tickets.error("Gagal cek ticket idle %s: %s", channel_id, e)
+                # advance() sudah mengeluarkan ticket dari wheel: kalau masih
+                # terbuka tapi tidak dijadwalkan ulang (close gagal / sedang
+                # ditutup manual), coba lagi nanti supaya tidak lolos auto-close
+                if channel_id in self.last_activity and channel_id not in self.wheel:
+                    self.wheel.schedule(channel_id, TICKET_IDLE_RETRY)
+
+    async def check(self, channel_id):
+        if channel_id not in self.last_activity:
+            return
+        channel = self.bot.get_channel(channel_id)
+        if channel is None or not active_tickets.is_ticket(channel_id):
+            self.forget(channel_id)
+            active_tickets.remove_channel(channel_id)
+            return
+
+        now = time.time()
+        warned_at = self.warned.get(channel_id)
+        if warned_at is None:
+            idle_left = self.last_activity[channel_id] + self.warn_after - now
+            if idle_left > 0:
+                self.wheel.schedule(channel_id, idle_left)
+                return
+            self.warned[channel_id] = now
+            self.wheel.schedule(channel_id, self.close_after)
+            await outbound.send(channel, content=(
+                f"⏰ Ticket ini tidak aktif selama {self.warn_after // 3600} jam. "
+                f"Kalau tidak ada pesan, ticket ditutup otomatis <t:{int(now + self.close_after)}:R>."
+            ))
+            log_tickets.info("Ticket %s tidak aktif, peringatan dikirim", channel.name)
+        elif now - warned_at < self.close_after:
+            self.wheel.schedule(channel_id, warned_at + self.close_after - now)
+        else:
+            log_tickets.info("Ticket %s ditutup otomatis (tidak aktif)", channel.name)
+            await close_ticket(self.bot, channel, "Auto-close (tidak aktif)")
 
 # ---------------------------
 # VERIF VIEW
@@ -339,6 +1808,7 @@ class VerifView(ui.View):
         super().__init__(timeout=None)
 
     @ui.button(label="Verifikasi ✔", style=ButtonStyle.green, custom_id="verif_button")
+    @timed_view_callback
     async def verif(self, interaction: Interaction, button: ui.Button):
         member = interaction.user
         guild = interaction.guild
@@ -351,6 +1821,7 @@ class VerifView(ui.View):
         await interaction.response.send_message(f"✅ {member.mention}, kamu sudah **terverifikasi**!\nSelamat datang 🎉", ephemeral=True)
 
     @ui.button(label="Info", style=ButtonStyle.blurple, custom_id="info_button")
+    @timed_view_callback
     async def info(self, interaction: Interaction, button: ui.Button):
         embed = dc.Embed(
             title="📘 Info & Peraturan Server",
@@ -387,15 +1858,1150 @@ def get_verif_embed():
     embed.set_footer(text="VoraHub Official • © 2025")
     return embed
 
+# ---------------------------
+# WARN LIST VIEW
+# ---------------------------
+def format_warn(index, record):
+    reason = record.reason
+    if len(reason) > WARNLIST_REASON_CHARS:
+        reason = reason[:WARNLIST_REASON_CHARS - 1] + "…"
+    line = f"**{index}.** {reason}"
+    details = []
+    if record.moderator_id:
+        details.append(f"by <@{record.moderator_id}>")
+    if record.created_at:
+        details.append(f"<t:{int(record.created_at)}:R>")
+    if record.expires_at:
+        details.append(f"expires <t:{int(record.expires_at)}:R>")
+    if details:
+        line += "\n-# " + " • ".join(details)
+    return line
+
+
+# Satu halaman mulai dari records[start], dipotong by jumlah karakter (maks
+# WARNLIST_PAGE_SIZE warn) supaya reason panjang tidak tembus limit 4096
+# karakter description. Return (baris, index awal halaman berikutnya).
+def warn_page(records, start):
+    lines, size = [], 0
+    for i in range(start, len(records)):
+        line = format_warn(i + 1, records[i])
+        if lines and (len(lines) >= WARNLIST_PAGE_SIZE or size + len(line) + 1 > WARNLIST_PAGE_CHARS):
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return lines, start + len(lines)
+
+
+# Halaman dirender saat dibuka saja; index awal halaman yang sudah pernah
+# dibuka disimpan di `starts` supaya tombol ◀️ tidak perlu hitung ulang.
+class WarnListView(ui.View):
+    def __init__(self, author_id, member, records):
+        super().__init__(timeout=180)
+        self.author_id = author_id
+        self.member = member
+        self.records = records
+        self.starts = [0]
+        self.page = 0
+        self.render_page()
+
+    def render_page(self):
+        start = self.starts[self.page]
+        self.lines, self.end = warn_page(self.records, start)
+        if self.page == len(self.starts) - 1 and self.end < len(self.records):
+            self.starts.append(self.end)
+        self.update_buttons()
+
+    def build_embed(self):
+        start = self.starts[self.page]
+        embed = dc.Embed(
+            title=f"Warns — {self.member}",
+            description="\n".join(self.lines),
+            color=VORA_BLUE
+        )
+        embed.set_footer(text=f"Page {self.page + 1} • Warns {start + 1}-{self.end} of {len(self.records)}")
+        return embed
+
+    def update_buttons(self):
+        self.prev_page.disabled = self.page == 0
+        self.next_page.disabled = self.end >= len(self.records)
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Ini bukan warnlist kamu.", ephemeral=True)
+            return False
+        return True
+
+    @ui.button(emoji="◀️", style=ButtonStyle.gray)
+    async def prev_page(self, interaction: Interaction, button: ui.Button):
+        self.page -= 1
+        self.render_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @ui.button(emoji="▶️", style=ButtonStyle.gray)
+    async def next_page(self, interaction: Interaction, button: ui.Button):
+        self.page += 1
+        self.render_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+# ---------------------------
+# WELCOME CARD
+# ---------------------------
+CARD_W, CARD_H = 735, 386
+CARD_BACKGROUND_FILE = os.path.join(BASE_DIR, "background.jpg")
+CARD_FONT_FILE = os.path.join(BASE_DIR, "DIN-Next-LT-W04-Heavy.ttf")
+CARD_RENDER_WORKERS = 2
+
+# Kartu selalu opaque (background jpg), jadi di-encode sebagai RGB tanpa alpha.
+# Hasil `python benchmark.py card_encode` untuk kartu 735x386:
+#   png (level 6) ~90 ms / 360 KB, png8 ~75 ms / 100 KB,
+#   webp (q85, method 4) ~60 ms / 49 KB, jpeg (q88) ~5 ms / 70 KB
+CARD_FORMAT = "jpeg"                     # "png" | "png8" | "webp" | "jpeg"
+CARD_QUALITY = {
+    "png": 6,        # compress_level 0-9
+    "png8": 256,     # jumlah warna palette
+    "webp": 85,      # quality 0-100
+    "jpeg": 88,      # quality 0-95
+}
+CARD_WEBP_METHOD = 4                     # 0 = cepat/besar, 6 = lambat/kecil
+
+COLLAGE_THUMB = 64
+COLLAGE_GAP = 8
+COLLAGE_CELL = COLLAGE_THUMB + COLLAGE_GAP
+COLLAGE_COLUMNS = 10
+COLLAGE_ROWS = 3
+
+AVATAR_CACHE_SIZE = 256          # ~115 KB per avatar 170px RGBA
+AVATAR_CACHE_TTL = 60 * 60       # detik
+AVATAR_FETCH_SIZE = 256          # ukuran CDN terkecil >= AVATAR_SIZE
+HTTP_POOL_SIZE = 20
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5)
+
+AVATAR_SIZE = 170
+AVATAR_BORDER = 5
+AVATAR_FULL_SIZE = AVATAR_SIZE + AVATAR_BORDER * 2
+AVATAR_POS = (CARD_W // 2 - AVATAR_FULL_SIZE // 2, 50)
+
+CARD_TITLE_Y = AVATAR_POS[1] + AVATAR_FULL_SIZE + 60
+CARD_NAME_Y = CARD_TITLE_Y + 25
+CARD_NAME_FONT_SIZE = 28
+CARD_NAME_MIN_FONT_SIZE = 16      # nama lebih panjang dari ini dipotong pakai "…"
+CARD_NAME_MAX_WIDTH = CARD_W - 60
+NAME_SPRITE_CACHE_SIZE = 1024     # sprite nama (shadow + fill) yang disimpan
+
+# Dipakai kalau font kartu tidak punya glyph untuk nama (Cyrillic, CJK, dll).
+# Yang pertama ada di disk dan punya semua glyph-nya yang dipakai.
+CARD_FALLBACK_FONT_FILES = [
+    os.path.join(BASE_DIR, "NotoSansCJK-Bold.ttc"),
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+    "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+]
+CARD_MODES = {
+    "welcome": ("WELCOME", (156, 201, 217)),
+    "goodbye": ("GOODBYE", (156, 201, 217)),
+}
+
+
+def _encode_png(card, fp, level):
+    card.save(fp, "PNG", compress_level=level)
+
+
+def _encode_png8(card, fp, colors):
+    card.quantize(colors, method=Image.Quantize.FASTOCTREE).save(fp, "PNG", optimize=True)
+
+
+def _encode_webp(card, fp, quality):
+    card.save(fp, "WEBP", quality=quality, method=CARD_WEBP_METHOD)
+
+
+def _encode_jpeg(card, fp, quality):
+    card.save(fp, "JPEG", quality=quality, optimize=True)
+
+
+CARD_ENCODERS = {
+    "png": ("png", _encode_png),
+    "png8": ("png", _encode_png8),
+    "webp": ("webp", _encode_webp),
+    "jpeg": ("jpg", _encode_jpeg),
+}
+
+
+def encode_card(card, fmt=CARD_FORMAT, quality=None):
+    _, encoder = CARD_ENCODERS[fmt]
+    buffer = io.BytesIO()
+    encoder(card.convert("RGB"), buffer, CARD_QUALITY[fmt] if quality is None else quality)
+    buffer.seek(0)
+    return buffer
+
+
+def draw_text_with_shadow(draw, pos, text, font, fill, shadow_offset=(3, 3)):
+    x, y = pos
+    draw.text((x + shadow_offset[0], y + shadow_offset[1]), text,
+              font=font, fill=(0, 0, 0, 150), anchor="ms")
+    draw.text((x, y), text, font=font, fill=fill, anchor="ms")
+
+
+# Layer statis (background, frame, judul) dibuat sekali saat start, per member
+# cuma avatar + nama yang di-composite. `render` jalan di worker thread, jadi
+# font disimpan per thread (FreeType face tidak thread-safe).
+# Nama di-render sekali jadi sprite RGBA (shadow + fill) dan disimpan LRU,
+# join/leave berikutnya dengan nama sama tinggal alpha_composite.
+class WelcomeCardRenderer:
+    def __init__(self, fmt=CARD_FORMAT):
+        self.fmt = fmt
+        self.extension = CARD_ENCODERS[fmt][0]
+
+        background = Image.open(CARD_BACKGROUND_FILE).convert("RGBA")
+        background = background.resize((CARD_W, CARD_H))
+
+        self.mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
+        ImageDraw.Draw(self.mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+
+        frame = Image.new("RGBA", (AVATAR_FULL_SIZE, AVATAR_FULL_SIZE), (0, 0, 0, 0))
+        ImageDraw.Draw(frame).ellipse((0, 0, AVATAR_FULL_SIZE, AVATAR_FULL_SIZE), fill=(255, 255, 255))
+
+        self._local = threading.local()
+        self.load_fonts()
+        self.fallback_fonts = [path for path in CARD_FALLBACK_FONT_FILES if os.path.exists(path)]
+        self.missing_glyphs = {}
+        self.name_sprites = OrderedDict()
+        self.sprite_lock = threading.Lock()
+
+        font_big = self._local.font_big
+        self.bases = {}
+        self.collage_bases = {}
+        for mode, (title, color) in CARD_MODES.items():
+            base = background.copy()
+            draw_text_with_shadow(ImageDraw.Draw(base), (CARD_W // 2, CARD_TITLE_Y), title, font_big, color)
+            self.collage_bases[mode] = base.copy()
+            base.paste(frame, AVATAR_POS, frame)
+            self.bases[mode] = base
+
+    def load_fonts(self):
+        self._local.font_big = ImageFont.truetype(CARD_FONT_FILE, 60)
+        self._local.fonts = {}
+
+    def font(self, path, size):
+        fonts = self._local.fonts
+        if (path, size) not in fonts:
+            fonts[path, size] = ImageFont.truetype(path, size)
+        return fonts[path, size]
+
+    # Glyph yang tidak ada di font di-render sebagai kotak .notdef, jadi
+    # bandingkan mask-nya dengan mask codepoint yang pasti tidak ada.
+    def has_glyphs(self, path, text):
+        font = self.font(path, CARD_NAME_FONT_SIZE)
+        notdef = None
+        for ch in set(text):
+            key = (path, ch)
+            if key not in self.missing_glyphs:
+                if notdef is None:
+                    notdef = bytes(font.getmask("\U0010FFFF"))
+                self.missing_glyphs[key] = not ch.isspace() and bytes(font.getmask(ch)) == notdef
+            if self.missing_glyphs[key]:
+                return False
+        return True
+
+    def font_file_for(self, text):
+        if self.has_glyphs(CARD_FONT_FILE, text):
+            return CARD_FONT_FILE
+        for path in self.fallback_fonts:
+            if self.has_glyphs(path, text):
+                return path
+        return CARD_FONT_FILE
+
+    # Ukuran font diturunkan sesuai lebar terukur, kalau di ukuran minimum
+    # masih kepanjangan baru dipotong.
+    def layout_name(self, text):
+        path = self.font_file_for(text)
+        font = self.font(path, CARD_NAME_FONT_SIZE)
+        width = font.getlength(text)
+        if width > CARD_NAME_MAX_WIDTH:
+            size = max(CARD_NAME_MIN_FONT_SIZE, int(CARD_NAME_FONT_SIZE * CARD_NAME_MAX_WIDTH / width))
+            font = self.font(path, size)
+            if font.getlength(text) > CARD_NAME_MAX_WIDTH:
+                while text and font.getlength(text + "…") > CARD_NAME_MAX_WIDTH:
+                    text = text[:-1]
+                text += "…"
+        return text, font
+
+    # Return (sprite, offset) dengan offset relatif ke titik anchor "ms"
+    def name_sprite(self, name):
+        with self.sprite_lock:
+            cached = self.name_sprites.get(name)
+            if cached is not None:
+                self.name_sprites.move_to_end(name)
+                return cached
+
+        text, font = self.layout_name(name)
+        left, top, right, bottom = font.getbbox(text, anchor="ms")
+        shadow = 3
+        sprite = Image.new("RGBA", (right - left + shadow, bottom - top + shadow), (0, 0, 0, 0))
+        draw_text_with_shadow(ImageDraw.Draw(sprite), (-left, -top), text, font, "white", (shadow, shadow))
+        cached = (sprite, (left, top))
+
+        with self.sprite_lock:
+            self.name_sprites[name] = cached
+            while len(self.name_sprites) > NAME_SPRITE_CACHE_SIZE:
+                self.name_sprites.popitem(last=False)
+        return cached
+
+    def draw_name(self, card, name):
+        sprite, (left, top) = self.name_sprite(name)
+        card.alpha_composite(sprite, (CARD_W // 2 + left, CARD_NAME_Y + top))
+
+    def prepare_avatar(self, avatar_bytes):
+        avatar = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
+        avatar = avatar.resize((AVATAR_SIZE, AVATAR_SIZE))
+        avatar.putalpha(self.mask)
+        return avatar
+
+    def render(self, avatar, name, mode):
+        card = self.bases.get(mode, self.bases["goodbye"]).copy()
+        card.paste(avatar, (AVATAR_POS[0] + AVATAR_BORDER, AVATAR_POS[1] + AVATAR_BORDER), avatar)
+
+        self.draw_name(card, name.upper())
+        return encode_card(card, self.fmt)
+
+    # Satu kartu untuk banyak member sekaligus (dipakai saat join/leave wave)
+    def render_collage(self, avatars, total, mode):
+        card = self.collage_bases.get(mode, self.collage_bases["goodbye"]).copy()
+        thumbs = avatars[:COLLAGE_COLUMNS * COLLAGE_ROWS]
+        rows = [thumbs[i:i + COLLAGE_COLUMNS] for i in range(0, len(thumbs), COLLAGE_COLUMNS)]
+        grid_h = len(rows) * COLLAGE_CELL
+        y = max(10, (CARD_TITLE_Y - 70 - grid_h) // 2)
+        for row in rows:
+            x = (CARD_W - len(row) * COLLAGE_CELL) // 2
+            for avatar in row:
+                thumb = avatar.resize((COLLAGE_THUMB, COLLAGE_THUMB))
+                card.paste(thumb, (x + COLLAGE_GAP // 2, y + COLLAGE_GAP // 2), thumb)
+                x += COLLAGE_CELL
+            y += COLLAGE_CELL
+
+        self.draw_name(card, f"{total} MEMBERS")
+        return encode_card(card, self.fmt)
+
+
+# LRU + TTL untuk avatar yang sudah di-decode, di-resize dan di-mask.
+# Key = hash avatar (Asset.key), jadi ganti avatar otomatis jadi cache miss.
+class AvatarCache:
+    def __init__(self, max_size=AVATAR_CACHE_SIZE, ttl=AVATAR_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, avatar = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return avatar
+
+    def put(self, key, avatar):
+        self._items[key] = (time.monotonic() + self.ttl, avatar)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+# ---------------------------
+# JOIN / LEAVE ANNOUNCER
+# ---------------------------
+WELCOME_CHANNEL = 1434568585132511505
+DEFAULT_ROLE_ID = 1443627247809335429
+
+ANNOUNCE_BURST_THRESHOLD = 5   # event ngantri >= ini -> digabung jadi satu pesan
+ANNOUNCE_WINDOW = 5            # detik, lama ngumpulin event saat burst
+ANNOUNCE_MAX_MENTIONS = 50
+ONBOARD_INTERVAL = 0.5         # detik antar member untuk DM + role
+
+ANNOUNCE_TEXT = {
+    "welcome": lambda member: f"Welcome {member.mention} to **{member.guild.name}**! 🎉",
+    "goodbye": lambda member: f"{member.mention} has left the server 😭.",
+}
+
+
+# Event join/leave masuk antrian. Kalau antrian sepi, kartu dikirim satu-satu
+# seperti biasa; kalau sudah numpuk (raid / mass leave), event dikumpulkan
+# selama ANNOUNCE_WINDOW lalu dikirim sebagai satu collage + satu pesan.
+class JoinLeaveAnnouncer:
+    def __init__(self, bot):
+        self.bot = bot
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def enqueue(self, member, mode):
+        self.queue.put_nowait((mode, member))
+
+    def _drain(self, batch):
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            self._drain(batch)
+            if len(batch) >= ANNOUNCE_BURST_THRESHOLD:
+                await asyncio.sleep(ANNOUNCE_WINDOW)
+                self._drain(batch)
+
+            groups = {}
+            for mode, member in batch:
+                groups.setdefault((member.guild.id, mode), []).append(member)
+
+            for (_, mode), members in groups.items():
+                try:
+                    if len(members) >= ANNOUNCE_BURST_THRESHOLD:
+                        await self.send_summary(members, mode)
+                    else:
+                        for member in members:
+                            await self.send_single(member, mode)
+                except Exception as e:
+                    log_welcome.error("Gagal kirim %s (%d member): %s", mode, len(members), e)
+
+    async def send_single(self, member, mode):
+        channel = member.guild.get_channel(WELCOME_CHANNEL)
+        if not channel:
+            return
+        image = await self.bot.create_welcome_image(member, mode)
+        await outbound.send(
+            channel, content=ANNOUNCE_TEXT[mode](member), file=dc.File(image, f"{mode}.{self.bot.card_renderer.extension}")
+        )
+
+    async def send_summary(self, members, mode):
+        guild = members[0].guild
+        channel = guild.get_channel(WELCOME_CHANNEL)
+        if not channel:
+            return
+
+        image = await self.bot.create_collage_image(members, mode)
+
+        mentions = " ".join(m.mention for m in members[:ANNOUNCE_MAX_MENTIONS])
+        rest = len(members) - ANNOUNCE_MAX_MENTIONS
+        if rest > 0:
+            mentions += f" and {rest} others"
+        if mode == "welcome":
+            content = f"Welcome {mentions} to **{guild.name}**! 🎉"
+        else:
+            content = f"{mentions} have left the server 😭."
+
+        await outbound.send(channel, content=content, file=dc.File(image, f"{mode}.{self.bot.card_renderer.extension}"))
+        log_welcome.info("%d %s digabung jadi satu pesan di %s", len(members), mode, guild.name)
+
+
+# DM welcome + DEFAULT_ROLE_ID jalan di antrian sendiri dengan jeda tetap,
+# jadi wave join tidak rebutan rate limit dengan pengumuman di WELCOME_CHANNEL.
+# 429 ditunggu sendiri oleh HTTP client discord.py (max_ratelimit_timeout tidak
+# di-set), jadi antrian cukup lanjut setelah request selesai.
+class OnboardingQueue:
+    def __init__(self, interval=ONBOARD_INTERVAL):
+        self.interval = interval
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def enqueue(self, member):
+        self.queue.put_nowait(member)
+
+    async def _run(self):
+        while True:
+            member = await self.queue.get()
+            try:
+                await self.onboard(member)
+            except Exception as e:
+                log_welcome.error("Gagal onboarding %s: %s", member, e)
+            await asyncio.sleep(self.interval)
+
+    async def onboard(self, member):
+        role = member.guild.get_role(DEFAULT_ROLE_ID)
+        if role:
+            try:
+                await member.add_roles(role)
+                log_welcome.info("%s telah diberi role %s", member.name, role.name)
+            except dc.NotFound:
+                return  # member sudah keluar
+            except dc.Forbidden as e:
+                log_welcome.warning("Gagal memberikan role: %s", e)
+
+        try:
+            await member.send(f"Welcome to **{member.guild.name}**, {member.name}!")
+        except dc.HTTPException:
+            log_welcome.debug("DM ke %s tidak bisa dikirim.", member)
+
+# ---------------------------
+# BULK MODERATION
+# ---------------------------
+BULK_WORKERS = 4                 # kick/timeout paralel maksimal
+BULK_BAN_CHUNK = 200             # batas guild.bulk_ban per request
+BULK_MAX_TARGETS = 1000
+BULK_PROGRESS_INTERVAL = 3       # detik antar update progress
+BULK_ACTIONS = {
+    # action: (permission, past tense)
+    "ban": ("ban_members", "banned"),
+    "kick": ("kick_members", "kicked"),
+    "timeout": ("moderate_members", "timed out"),
+}
+
+
+def is_immune(member):
+    guild = getattr(member, "guild", None)
+    if member.id in IMMUNE_USERS:
+        return True
+    return guild is not None and (member.id == guild.owner_id or member.id == guild.me.id)
+
+
+def parse_member_ids(text):
+    return {int(m) for m in re.findall(r"\d{15,20}", text or "")}
+
+
+# Filter digabung (AND). Id yang tidak ada di guild tetap ikut untuk ban
+# (ban by id), untuk kick/timeout di-skip karena butuh member. Return
+# (target, jumlah yang dipotong karena lewat BULK_MAX_TARGETS).
+def select_bulk_targets(guild, action, ids=None, joined_within_minutes=None, account_age_days=None):
+    now = dc.utils.utcnow()
+    if ids:
+        targets = []
+        for member_id in ids:
+            member = guild.get_member(member_id)
+            if member is not None:
+                targets.append(member)
+            elif action == "ban":
+                targets.append(dc.Object(id=member_id))
+    elif joined_within_minutes is not None or account_age_days is not None:
+        targets = list(guild.members)
+    else:
+        return [], 0
+
+    if joined_within_minutes is not None:
+        since = now - timedelta(minutes=joined_within_minutes)
+        targets = [m for m in targets if getattr(m, "joined_at", None) and m.joined_at >= since]
+    if account_age_days is not None:
+        since = now - timedelta(days=account_age_days)
+        targets = [m for m in targets if m.created_at >= since]
+    return targets[:BULK_MAX_TARGETS], max(0, len(targets) - BULK_MAX_TARGETS)
+
+
+class BulkResult(NamedTuple):
+    done: int
+    failed: int
+    skipped: int
+
+
+# Kick/timeout jalan di BULK_WORKERS task yang ambil dari satu antrian, ban
+# pakai guild.bulk_ban per BULK_BAN_CHUNK user. `progress(done, total)` dipanggil
+# paling sering tiap BULK_PROGRESS_INTERVAL detik. Pemanggil wajib `reserve`
+# guild sebelum await pertama dan `release` di finally (satu run per guild).
+class BulkModeration:
+    def __init__(self, workers=BULK_WORKERS):
+        self.workers = workers
+        self.running = set()     # guild id yang sedang jalan
+
+    def reserve(self, guild_id):
+        if guild_id in self.running:
+            return False
+        self.running.add(guild_id)
+        return True
+
+    def release(self, guild_id):
+        self.running.discard(guild_id)
+
+    async def run(self, guild, action, targets, reason, timeout_minutes=60, progress=None):
+        immune = [t for t in targets if is_immune(t)]
+        targets = [t for t in targets if not is_immune(t)]
+        state = {"done": 0, "failed": 0, "reported": time.monotonic()}
+        total = len(targets)
+
+        async def report(force=False):
+            now = time.monotonic()
+            if progress is not None and (force or now - state["reported"] >= BULK_PROGRESS_INTERVAL):
+                state["reported"] = now
+                try:
+                    await progress(state["done"] + state["failed"], total)
+                except dc.HTTPException as e:
+                    log_moderation.warning("Gagal update progress bulk %s: %s", action, e)
+
+        if action == "ban":
+            for i in range(0, total, BULK_BAN_CHUNK):
+                chunk = targets[i:i + BULK_BAN_CHUNK]
+                try:
+                    result = await guild.bulk_ban(chunk, reason=reason, delete_message_seconds=3600)
+                    state["done"] += len(result.banned)
+                    state["failed"] += len(result.failed)
+                except dc.HTTPException as e:
+                    log_moderation.error("bulk_ban gagal (%d user): %s", len(chunk), e)
+                    state["failed"] += len(chunk)
+                await report()
+        else:
+            pending = asyncio.Queue()
+            for target in targets:
+                pending.put_nowait(target)
+            duration = timedelta(minutes=timeout_minutes)
+
+            async def worker():
+                while not pending.empty():
+                    member = pending.get_nowait()
+                    try:
+                        if action == "kick":
+                            await member.kick(reason=reason)
+                        else:
+                            await member.timeout(duration, reason=reason)
+                        state["done"] += 1
+                    except dc.HTTPException as e:
+                        log_moderation.warning("Bulk %s gagal untuk %s: %s", action, member, e)
+                        state["failed"] += 1
+                    await report()
+
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, total))))
+        await report(force=True)
+        return BulkResult(state["done"], state["failed"], len(immune))
+
+
+bulk_moderation = BulkModeration()
+
+# ---------------------------
+# RAID LOCKDOWN
+# ---------------------------
+# Join rate dihitung per guild di sliding window RAID_WINDOW detik. Kalau
+# tembus RAID_JOIN_THRESHOLD, guild masuk lockdown: kartu, DM dan role tidak
+# diproses, member baru dinilai (akun baru / tanpa avatar / avatar kembar)
+# dan yang mencurigakan dikumpulkan untuk /raid. Lockdown lepas sendiri kalau
+# rate sudah di bawah RAID_RELEASE_THRESHOLD selama RAID_CALM_PERIOD; member
+# yang tidak dicurigai (dan masih di server) lalu di-onboard seperti biasa.
+RAID_WINDOW = 30                 # detik
+RAID_JOIN_THRESHOLD = 10         # join per window -> lockdown
+RAID_RELEASE_THRESHOLD = 3       # join per window untuk dianggap tenang
+RAID_CALM_PERIOD = 120           # detik tenang sebelum lockdown dilepas
+RAID_CHECK_INTERVAL = 5
+RAID_NEW_ACCOUNT_DAYS = 7
+RAID_SHARED_AVATAR_COUNT = 3     # avatar sama dipakai >= ini join di window
+RAID_SUSPECT_SCORE = 2           # jumlah tanda minimal untuk jadi suspect
+RAID_ALERT_CHANNEL_ID = TICKET_LOG_CHANNEL_ID
+
+
+class Lockdown:
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.calm_since = None
+        self.suspects = {}       # member id -> member
+        self.held = {}           # member id -> member, di-onboard saat lepas
+
+
+class RaidGuard:
+    def __init__(self, bot):
+        self.bot = bot
+        self.joins = {}          # guild id -> deque (waktu, avatar key)
+        self.avatars = {}        # guild id -> {avatar key: jumlah di window}
+        self.lockdowns = {}      # guild id -> Lockdown
+        self.suspects = {}       # guild id -> {member id: member}, sisa setelah lockdown lepas
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def is_locked(self, guild_id):
+        return guild_id in self.lockdowns
+
+    def _window(self, guild_id, now):
+        joins = self.joins.setdefault(guild_id, deque())
+        avatars = self.avatars.setdefault(guild_id, {})
+        while joins and joins[0][0] < now - RAID_WINDOW:
+            _, key = joins.popleft()
+            if key is not None:
+                avatars[key] -= 1
+                if not avatars[key]:
+                    del avatars[key]
+        return joins, avatars
+
+    def suspicion(self, member, avatars):
+        reasons = []
+        if member.created_at >= dc.utils.utcnow() - timedelta(days=RAID_NEW_ACCOUNT_DAYS):
+            reasons.append("akun baru")
+        if member.avatar is None:
+            reasons.append("tanpa avatar")
+        elif avatars.get(member.avatar.key, 0) >= RAID_SHARED_AVATAR_COUNT:
+            reasons.append("avatar kembar")
+        return reasons
+
+    # Return True kalau join diproses normal (kartu, DM, role)
+    def on_join(self, member):
+        guild_id = member.guild.id
+        now = time.monotonic()
+        joins, avatars = self._window(guild_id, now)
+        key = member.avatar.key if member.avatar is not None else None
+        joins.append((now, key))
+        if key is not None:
+            avatars[key] = avatars.get(key, 0) + 1
+
+        lockdown = self.lockdowns.get(guild_id)
+        if lockdown is None:
+            if len(joins) < RAID_JOIN_THRESHOLD:
+                return True
+            lockdown = self.lockdowns[guild_id] = Lockdown(now)
+            log_moderation.warning("LOCKDOWN %s: %d join dalam %ds", member.guild.name, len(joins), RAID_WINDOW)
+            self.alert(member.guild, (
+                f"🚨 **Raid lockdown aktif** — {len(joins)} join dalam {RAID_WINDOW} detik.\n"
+                "Kartu welcome, DM dan role dihentikan sementara. Pakai `/raid` untuk lihat / tindak suspect."
+            ))
+
+        lockdown.calm_since = None
+        reasons = self.suspicion(member, avatars)
+        if len(reasons) >= RAID_SUSPECT_SCORE and not is_immune(member):
+            lockdown.suspects[member.id] = member
+            raid_joins.inc("suspect")
+            log_moderation.info("Suspect %s (%s)", member, ", ".join(reasons))
+        else:
+            lockdown.held[member.id] = member
+            raid_joins.inc("held")
+        return False
+
+    def on_leave(self, member):
+        lockdown = self.lockdowns.get(member.guild.id)
+        if lockdown is not None:
+            lockdown.held.pop(member.id, None)
+        return lockdown is None
+
+    def take_suspects(self, guild_id):
+        suspects = dict(self.suspects.pop(guild_id, {}))
+        lockdown = self.lockdowns.get(guild_id)
+        if lockdown is not None:
+            suspects.update(lockdown.suspects)
+            lockdown.suspects = {}
+        return list(suspects.values())
+
+    def pending_suspects(self, guild_id):
+        lockdown = self.lockdowns.get(guild_id)
+        return len(self.suspects.get(guild_id, {})) + (len(lockdown.suspects) if lockdown else 0)
+
+    def alert(self, guild, text):
+        channel = guild.get_channel(RAID_ALERT_CHANNEL_ID)
+        if channel:
+            outbound.send(channel, content=text, priority=PRIORITY_HIGH)
+
+    def release(self, guild):
+        lockdown = self.lockdowns.pop(guild.id, None)
+        if lockdown is None:
+            return
+        self.suspects.setdefault(guild.id, {}).update(lockdown.suspects)
+        held = [m for m in lockdown.held.values() if guild.get_member(m.id) is not None]
+        for member in held:
+            self.bot.onboarding.enqueue(member)
+        pending = len(self.suspects[guild.id])
+        log_moderation.warning("Lockdown %s selesai, %d member di-onboard, %d suspect", guild.name, len(held), pending)
+        self.alert(guild, (
+            f"✅ **Raid lockdown selesai.** {len(held)} member di-onboard, "
+            f"{pending} suspect menunggu `/raid`."
+        ))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(RAID_CHECK_INTERVAL)
+            now = time.monotonic()
+            for guild_id, lockdown in list(self.lockdowns.items()):
+                joins, _ = self._window(guild_id, now)
+                if len(joins) > RAID_RELEASE_THRESHOLD:
+                    lockdown.calm_since = None
+                elif lockdown.calm_since is None:
+                    lockdown.calm_since = now
+                elif now - lockdown.calm_since >= RAID_CALM_PERIOD:
+                    guild = self.bot.get_guild(guild_id)
+                    if guild is None:
+                        self.lockdowns.pop(guild_id, None)
+                    else:
+                        self.release(guild)
+
+# ---------------------------
+# ANTI-SPAM
+# ---------------------------
+# Per (guild, user) cuma disimpan ring buffer SPAM_FLOOD_COUNT pesan terakhir
+# (waktu + hash isi) plus hitungan hash, jadi cek flood / duplikat O(1) per
+# pesan. User diurutkan LRU by aktivitas terakhir: yang idle > SPAM_IDLE_SECONDS
+# atau di luar SPAM_TRACKED_USERS dibuang, memori tetap terbatas.
+SPAM_WINDOW = 8                  # detik
+SPAM_FLOOD_COUNT = 6             # pesan dalam window -> flood
+SPAM_DUPLICATE_COUNT = 3         # pesan sama dalam window -> duplicate
+SPAM_MENTION_LIMIT = 6           # mention user + role dalam satu pesan
+SPAM_TRACKED_USERS = 5000
+SPAM_IDLE_SECONDS = 60
+SPAM_TIMEOUT_MINUTES = 10
+SPAM_ACTION_COOLDOWN = 30        # detik, pesan yang telat masuk tidak dihukum dua kali
+SPAM_EXEMPT_ROLE_IDS = frozenset({STAFF_ROLE_ID, HELPER_ROLE_ID})
+SPAM_REASONS = {
+    "flood": "flood pesan",
+    "duplicate": "spam pesan yang sama",
+    "mentions": "mass mention",
+}
+
+
+class SpamHistory:
+    __slots__ = ("ring", "counts", "last_seen", "last_action")
+
+    def __init__(self):
+        self.ring = deque()      # (waktu, hash isi)
+        self.counts = {}         # hash isi -> jumlah di ring
+        self.last_seen = 0.0
+        self.last_action = 0.0
+
+    def _pop(self):
+        _, digest = self.ring.popleft()
+        if digest is not None:
+            self.counts[digest] -= 1
+            if not self.counts[digest]:
+                del self.counts[digest]
+
+    def push(self, now, digest):
+        while self.ring and (now - self.ring[0][0] > SPAM_WINDOW or len(self.ring) >= SPAM_FLOOD_COUNT):
+            self._pop()
+        self.ring.append((now, digest))
+        if digest is not None:
+            self.counts[digest] = self.counts.get(digest, 0) + 1
+        self.last_seen = now
+
+
+class AntiSpam:
+    def __init__(self, bot, max_users=SPAM_TRACKED_USERS):
+        self.bot = bot
+        self.max_users = max_users
+        self.histories = OrderedDict()   # (guild id, user id) -> SpamHistory
+
+    def __len__(self):
+        return len(self.histories)
+
+    @staticmethod
+    def is_exempt(member):
+        if is_immune(member) or member.guild_permissions.manage_messages:
+            return True
+        return any(role.id in SPAM_EXEMPT_ROLE_IDS for role in getattr(member, "roles", ()))
+
+    def _evict(self, now):
+        histories = self.histories
+        while histories:
+            oldest = next(iter(histories.values()))
+            if len(histories) <= self.max_users and now - oldest.last_seen <= SPAM_IDLE_SECONDS:
+                break
+            histories.popitem(last=False)
+
+    # Return jenis spam ("flood" / "duplicate" / "mentions") atau None
+    def check(self, message):
+        now = time.monotonic()
+        key = (message.guild.id, message.author.id)
+        history = self.histories.get(key)
+        if history is None:
+            history = self.histories[key] = SpamHistory()
+        else:
+            self.histories.move_to_end(key)
+
+        content = " ".join(message.content.lower().split())
+        history.push(now, hash(content) if content else None)
+        self._evict(now)
+
+        if message.mention_everyone or len(message.mentions) + len(message.role_mentions) >= SPAM_MENTION_LIMIT:
+            kind = "mentions"
+        elif len(history.ring) >= SPAM_FLOOD_COUNT:
+            kind = "flood"
+        elif content and history.counts[hash(content)] >= SPAM_DUPLICATE_COUNT:
+            kind = "duplicate"
+        else:
+            return None
+        if now - history.last_action < SPAM_ACTION_COOLDOWN:
+            return None
+        history.last_action = now
+        spam_detections.inc(kind)
+        return kind
+
+    async def punish(self, message, kind):
+        member = message.author
+        reason = f"Auto anti-spam: {SPAM_REASONS[kind]}"
+        if kind in ("mentions", "duplicate"):
+            try:
+                await message.delete()
+            except dc.HTTPException:
+                pass
+        try:
+            await member.timeout(timedelta(minutes=SPAM_TIMEOUT_MINUTES), reason=reason)
+        except dc.HTTPException as e:
+            log_moderation.warning("Gagal timeout %s (%s): %s", member, kind, e)
+        days = WARN_DEFAULT_EXPIRY_DAYS
+        total = add_warn(
+            str(message.guild.id), str(member.id), reason,
+            self.bot.user.id if self.bot.user else None,
+            time.time() + days * 86400 if days else None
+        )
+        log_moderation.info("%s: %s di #%s (%d warn)", reason, member, message.channel, total)
+        outbound.send(
+            message.channel, priority=PRIORITY_HIGH,
+            content=f"🚫 {member.mention} di-timeout {SPAM_TIMEOUT_MINUTES} menit ({SPAM_REASONS[kind]}). Total warn: {total}"
+        )
+
+# ---------------------------
+# MESSAGE TRIGGERS
+# ---------------------------
+# Bisa di-override tanpa edit kode lewat triggers.json (format sama dengan
+# DEFAULT_TRIGGERS), lalu /reloadtriggers. Urutan list = prioritas.
+TRIGGER_FILE = os.path.join(BASE_DIR, "triggers.json")
+SHOP_CHANNELS = [1434540371186024479, 1434557030076514344, 1436968124699119636]
+DEFAULT_TRIGGERS = [
+    {"prefix": "!hello", "reply": "Hello {author}!!!", "case_sensitive": True},
+    {"prefix": ["!nigga", "!nigger"], "reply": "Bahlil hitam anjing cok tai"},
+    {
+        "prefix": "beli",
+        "reply": f"Jika ingin membeli silahkan membuka ticket pada channel <#{TICKET_PANEL_CHANNEL_ID}>",
+        "channels": SHOP_CHANNELS
+    },
+    {
+        "prefix": "buy",
+        "reply": f"If you want to buy, click the ticket button at <#{TICKET_PANEL_CHANNEL_ID}>",
+        "channels": SHOP_CHANNELS
+    },
+]
+
+
+class TriggerRule(NamedTuple):
+    prefixes: tuple
+    reply: str
+    case_sensitive: bool
+    channels: Optional[frozenset]
+
+    def render(self, message):
+        if "{" not in self.reply:
+            return self.reply
+        return (self.reply
+                .replace("{author}", str(message.author))
+                .replace("{mention}", message.author.mention))
+
+
+# Semua prefix di-compile sekali jadi satu regex ter-anchor per tabel channel
+# (rule global + rule khusus channel itu, urutan tetap). Per pesan cuma satu
+# lookup dict + satu regex match, tidak peduli berapa banyak trigger-nya.
+class TriggerRouter:
+    def __init__(self, rules):
+        self.rules = rules
+        global_rules = [i for i, r in enumerate(rules) if r.channels is None]
+        self.default_pattern = self._compile(global_rules)
+        channel_ids = frozenset().union(*(r.channels for r in rules if r.channels is not None))
+        self.channel_patterns = {
+            channel_id: self._compile([
+                i for i, r in enumerate(rules) if r.channels is None or channel_id in r.channels
+            ])
+            for channel_id in channel_ids
+        }
+
+    def _compile(self, indexes):
+        if not indexes:
+            return None
+        parts = []
+        for i in indexes:
+            rule = self.rules[i]
+            alternatives = "|".join(re.escape(p) for p in rule.prefixes)
+            if not rule.case_sensitive:
+                alternatives = f"(?i:{alternatives})"
+            parts.append(f"(?P<r{i}>{alternatives})")
+        return re.compile("|".join(parts))
+
+    @classmethod
+    def from_config(cls, entries):
+        rules = []
+        for entry in entries:
+            prefixes = entry["prefix"]
+            if isinstance(prefixes, str):
+                prefixes = [prefixes]
+            channels = entry.get("channels")
+            rules.append(TriggerRule(
+                tuple(prefixes),
+                entry["reply"],
+                entry.get("case_sensitive", False),
+                frozenset(int(c) for c in channels) if channels else None
+            ))
+        return cls(rules)
+
+    @classmethod
+    def load(cls, path=TRIGGER_FILE):
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_config(json.load(f))
+        return cls.from_config(DEFAULT_TRIGGERS)
+
+    def match(self, channel_id, content):
+        pattern = self.channel_patterns.get(channel_id, self.default_pattern)
+        if pattern is None:
+            return None
+        m = pattern.match(content)
+        if m is None:
+            return None
+        return self.rules[int(m.lastgroup[1:])]
+
+# ---------------------------
+# COMMAND SYNC
+# ---------------------------
+# Isi dengan id guild supaya command langsung bisa dipakai di guild itu (sync
+# per guild hitungan detik). None = global sync (propagasi lebih lama).
+# Mode guild juga menghapus command global yang pernah terdaftar (sekali, lalu
+# ditandai "{}" di meta) supaya command tidak muncul dobel di guild itu.
+COMMAND_SYNC_GUILD_ID = None
+
+
+# Fingerprint per command (hash payload JSON) disimpan di tabel meta bersama id
+# command dari Discord. Saat start cuma command yang berubah yang di-upsert dan
+# command yang hilang yang di-delete; bulk sync penuh hanya kalau belum ada
+# state tersimpan atau diff gagal.
+class CommandSyncManager:
+    def __init__(self, bot, guild_id=None):
+        self.bot = bot
+        self.guild = dc.Object(id=guild_id) if guild_id else None
+        self.meta_key = f"commands:guild:{guild_id}" if guild_id else "commands:global"
+
+    def current_commands(self):
+        tree = self.bot.tree
+        if self.guild:
+            tree.copy_global_to(guild=self.guild)
+        commands_ = {}
+        for cmd in tree.get_commands(guild=self.guild):
+            payload = cmd.to_dict(tree)
+            key = f"{payload.get('type', 1)}:{payload['name']}"
+            digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+            commands_[key] = (digest, payload)
+        return commands_
+
+    async def sync(self):
+        if self.guild:
+            await self.clear_global()
+        current = self.current_commands()
+        stored = json.loads(await store.get_meta_async(self.meta_key, "{}"))
+
+        if not stored:
+            return await self.full_sync(current)
+
+        changed = [key for key, (digest, _) in current.items() if stored.get(key, {}).get("hash") != digest]
+        removed = [key for key in stored if key not in current]
+        if not changed and not removed:
+            log_commands.info("Slash commands tidak berubah, skip sync.")
+            return
+
+        try:
+            await self.apply_diff(current, stored, changed, removed)
+        except dc.HTTPException as e:
+            log_commands.warning("Diff sync gagal (%s), fallback ke full sync.", e)
+            return await self.full_sync(current)
+
+        store.set_meta(self.meta_key, json.dumps(stored))
+        log_commands.info("Slash commands di-sync: %d diupdate, %d dihapus.", len(changed), len(removed))
+
+    async def apply_diff(self, current, stored, changed, removed):
+        http = self.bot.http
+        app_id = self.bot.application_id
+        for key in changed:
+            digest, payload = current[key]
+            if self.guild:
+                data = await http.upsert_guild_command(app_id, self.guild.id, payload)
+            else:
+                data = await http.upsert_global_command(app_id, payload)
+            stored[key] = {"hash": digest, "id": int(data["id"])}
+        for key in removed:
+            command_id = stored[key]["id"]
+            if self.guild:
+                await http.delete_guild_command(app_id, self.guild.id, command_id)
+            else:
+                await http.delete_global_command(app_id, command_id)
+            del stored[key]
+
+    async def clear_global(self):
+        # None = belum pernah dibersihkan (bisa ada sisa sync global lama)
+        if await store.get_meta_async("commands:global") == "{}":
+            return
+        try:
+            await self.bot.http.bulk_upsert_global_commands(self.bot.application_id, [])
+        except dc.HTTPException as e:
+            log_commands.warning("Gagal hapus command global: %s", e)
+            return
+        store.set_meta("commands:global", "{}")
+        log_commands.info("Command global dihapus (mode guild %s).", self.guild.id)
+
+    async def full_sync(self, current):
+        try:
+            synced = await self.bot.tree.sync(guild=self.guild)
+        except Exception as e:
+            log_commands.error("Failed to sync commands: %s", e)
+            return
+        ids = {f"{cmd.type.value}:{cmd.name}": cmd.id for cmd in synced}
+        state = {
+            key: {"hash": digest, "id": ids[key]}
+            for key, (digest, _) in current.items() if key in ids
+        }
+        store.set_meta(self.meta_key, json.dumps(state))
+        scope = f"guild {self.guild.id}" if self.guild else "global"
+        log_commands.info("Synced %d slash commands (%s).", len(synced), scope)
+
 # ---------------------------
 # CLIENT
 # ---------------------------
+# Waktu mulai disimpan di interaction.extras, diobserve saat command selesai
+# (Client.on_app_command_completion) atau error (on_error).
+class InstrumentedCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: Interaction, error: app_commands.AppCommandError):
+        observe_command(interaction, interaction.command, "error")
+        await super().on_error(interaction, error)
+
+
+def observe_command(interaction, command, status):
+    started_at = interaction.extras.get("started_at")
+    if started_at is not None and command is not None:
+        command_latency.observe(time.perf_counter() - started_at, command.qualified_name, status)
+
 class Client(commands.Bot):
     def __init__(self):
         intents = dc.Intents.default()
         intents.members = True
         intents.message_content = True
-        super().__init__(command_prefix="!", intents=intents)
+        super().__init__(command_prefix="!", intents=intents, tree_cls=InstrumentedCommandTree)
+
+        # Layer kartu welcome di-preload sekali, render PIL jalan di thread pool
+        self.card_renderer = WelcomeCardRenderer()
+        self.card_executor = ThreadPoolExecutor(
+            max_workers=CARD_RENDER_WORKERS,
+            thread_name_prefix="card-render",
+            initializer=self.card_renderer.load_fonts
+        )
+        self.avatar_cache = AvatarCache()
+        self.announcer = JoinLeaveAnnouncer(self)
+        self.onboarding = OnboardingQueue()
+        self.raid_guard = RaidGuard(self)
+        self.anti_spam = AntiSpam(self)
+        self.ticket_sweeper = TicketIdleSweeper(self)
+        self.session = None  # dibuat di setup_hook, butuh event loop
+        self.live_transcripts = LiveTranscriptLog() if LIVE_TRANSCRIPT_CAPTURE else None
+        self.attachment_archiver = AttachmentArchiver() if ARCHIVE_ATTACHMENTS else None
 
         self.ticket_panels = [
         {
@@ -431,183 +3037,222 @@ class Client(commands.Bot):
             "tag": None
         }
     ]
+        self.startup_reconciled = False
+        self.command_sync = CommandSyncManager(self, COMMAND_SYNC_GUILD_ID)
+        self.triggers = TriggerRouter.load()
+        self.metrics_runner = None
+        self.shutdown_task = None
 
     async def on_ready(self):
-        print(f"Logged in as {self.user}")
-        try:
-            synced = await self.tree.sync()
-            print(f"✅ Globally synced {len(synced)} slash commands.")
-        except Exception as e:
-            print(f"❌ Failed to sync commands: {e}")
-
+        log.info("Logged in as %s", self.user)
+
+        # on_ready juga jalan tiap reconnect; sync + panel cukup sekali per proses
+        if not self.startup_reconciled:
+            self.startup_reconciled = True
+            await self.command_sync.sync()
+            await asyncio.gather(*(self.reconcile_panel(panel) for panel in self.ticket_panels))
+            # Aktivitas terakhir ticket lama diambil dari id pesan terakhir (snowflake)
+            for channel_id in list(active_tickets.channel_ids()):
+                channel = self.get_channel(channel_id)
+                if channel is not None:
+                    last = channel.last_message_id
+                    self.ticket_sweeper.track(channel_id, dc.utils.snowflake_time(last).timestamp() if last else None)
+
+        # Tambal pesan ticket yang masuk selama bot offline
+        if self.live_transcripts is not None:
+            for channel_id in list(active_tickets.channel_ids()):
+                channel = self.get_channel(channel_id)
+                if channel:
+                    asyncio.create_task(self.live_transcripts.backfill(channel))
+
+    @staticmethod
+    def panel_fingerprint(embed, view, tag):
+        payload = {"embed": embed.to_dict(), "components": view.to_components(), "tag": tag}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    # Edit panel cuma kalau embed/view/tag berubah sejak edit terakhir. Kalau sama,
+    # view tetap didaftarkan ke message-nya supaya tombol jalan tanpa API call.
+    async def reconcile_panel(self, panel):
         # buat instance view di sini, saat loop sudah berjalan
-        for panel in self.ticket_panels:
-            await self.auto_edit_panel(
-                panel["channel_id"],
-                panel["message_id"],
-                panel["embed"],
-                panel["view"]()  # <-- bikin instance sekarang
-            )
+        view = panel["view"]()
+        key = f"panel:{panel['name']}"
+        message_id = int(await store.get_meta_async(f"{key}:message_id", panel["message_id"]))
+        fingerprint = self.panel_fingerprint(panel["embed"], view, panel["tag"])
+
+        # Hash sama belum tentu pesannya masih ada (bisa dihapus manual), jadi
+        # tetap satu fetch per proses sebelum skip
+        if await store.get_meta_async(f"{key}:hash") == fingerprint and await self.panel_exists(panel["channel_id"], message_id):
+            self.add_view(view, message_id=message_id)
+            log_panels.info("%s tidak berubah, skip edit.", panel["name"])
+            return
+
+        msg = await self.auto_edit_panel(panel["channel_id"], message_id, panel["embed"], view, panel["tag"])
+        if msg:
+            store.set_meta(f"{key}:message_id", msg.id)
+            store.set_meta(f"{key}:hash", fingerprint)
+
+    async def panel_exists(self, channel_id, message_id):
+        channel = self.get_channel(channel_id)
+        if not channel:
+            return True  # biar auto_edit_panel yang log channel hilang
+        try:
+            await channel.fetch_message(message_id)
+        except dc.NotFound:
+            log_panels.info("Message %s sudah dihapus, panel dibuat ulang.", message_id)
+            return False
+        except dc.HTTPException as e:
+            log_panels.warning("Gagal cek message %s: %s", message_id, e)
+        return True
 
     async def auto_edit_panel(self, channel_id, message_id, embed, view, tag=None):
         channel = self.get_channel(channel_id)
         if not channel:
-            print(f"[PANEL] Channel {channel_id} tidak ditemukan.")
-            return
+            log_panels.warning("Channel %s tidak ditemukan.", channel_id)
+            return None
         content = tag if tag else None
         try:
             msg = await channel.fetch_message(message_id)
             await msg.edit(content=content, embed=embed, view=view)
-            print(f"[PANEL] Message {message_id} berhasil di-edit.")
+            log_panels.info("Message %s berhasil di-edit.", message_id)
+            return msg
         except dc.NotFound:
-            await channel.send(content=content, embed=embed, view=view)
-            print(f"[PANEL] Message {message_id} tidak ditemukan, baru dibuat.")
+            msg = await channel.send(content=content, embed=embed, view=view)
+            log_panels.info("Message %s tidak ditemukan, baru dibuat.", message_id)
+            return msg
         except Exception as e:
-            print(f"[PANEL] Gagal edit/send message {message_id}: {e}")
+            log_panels.error("Gagal edit/send message %s: %s", message_id, e)
+            return None
 
     
     async def on_message(self, message: dc.Message):
-        if message.author == self.user:
-            return
-
-        ALLOWED_CHANNELS = {
-            1434540371186024479,
-            1434557030076514344,
-            1436968124699119636
-        }
-
-        print(f"Message from {message.author} in #{message.channel.name}: {message.content}")
-
-        if message.content.startswith('!hello'):
-            return await message.channel.send(f'Hello {message.author}!!!')
+        if self.live_transcripts is not None and active_tickets.is_ticket(message.channel.id):
+            await self.live_transcripts.append(message)
 
-        if message.content.lower().startswith(('!nigga', '!nigger')):
-            return await message.channel.send('Bahlil hitam anjing cok tai')
-
-        if message.channel.id in ALLOWED_CHANNELS:
+        if message.author.bot:
+            return
+        self.ticket_sweeper.touch(message.channel.id)
 
-            if message.content.lower().startswith('beli'):
-                return await message.channel.send(
-                    f'Jika ingin membeli silahkan membuka ticket pada channel <#{1434769506798010480}>'
-                )
+        if log_messages.isEnabledFor(logging.DEBUG) and message_log_sampler.hit():
+            log_messages.debug("Message from %s in #%s: %s", message.author, message.channel, message.content)
 
-            if message.content.lower().startswith('buy'):
-                return await message.channel.send(
-                    f'If you want to buy, click the ticket button at <#{1434769506798010480}>'
-                )
+        if message.guild is not None and not self.anti_spam.is_exempt(message.author):
+            kind = self.anti_spam.check(message)
+            if kind is not None:
+                asyncio.create_task(self.anti_spam.punish(message, kind))
+                return
 
-        await self.process_commands(message)
+        rule = self.triggers.match(message.channel.id, message.content)
+        if rule is not None:
+            return await message.channel.send(rule.render(message))
 
-    async def create_welcome_image(self, member, mode):
-        CANVAS_W, CANVAS_H = 735, 386
+        if message.content.startswith(self.command_prefix):
+            await self.process_commands(message)
 
-        def draw_text_with_shadow(draw, pos, text, font, fill, shadow_offset=(3, 3)):
-            x, y = pos
-            draw.text((x + shadow_offset[0], y + shadow_offset[1]), text,
-                      font=font, fill=(0, 0, 0, 150), anchor="ms")
-            draw.text((x, y), text, font=font, fill=fill, anchor="ms")
-
-        # Background
-        background = Image.open("background.jpg").convert("RGBA")
-        background = background.resize((CANVAS_W, CANVAS_H))
+    async def setup_hook(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300),
+            timeout=HTTP_TIMEOUT
+        )
+        self.announcer.start()
+        self.onboarding.start()
+        self.raid_guard.start()
+        self.ticket_sweeper.start()
+        # Tombol close/bayar di ticket lama tetap jalan setelah restart
+        self.add_view(TicketControlView(is_premium=True))
+        self.prune_warns.start()
+        if METRICS_PORT:
+            try:
+                self.metrics_runner = await start_metrics_server()
+            except OSError as e:
+                log.error("Gagal start metrics endpoint: %s", e)
+        # SIGTERM (docker stop / systemd) lewat close() supaya warn di buffer
+        # write-behind sempat di-flush oleh store.close()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.on_sigterm)
+        except NotImplementedError:  # Windows
+            pass
 
-        if mode == "welcome":
-            title = "WELCOME"
-            color = (156, 201, 217)
-        else:
-            title = "GOODBYE"
-            color = (156, 201, 217)
+    def on_sigterm(self):
+        if self.shutdown_task is not None:
+            return
+        log.info("SIGTERM diterima, shutdown...")
+        self.shutdown_task = asyncio.create_task(self.close())
+
+    @tasks.loop(minutes=WARN_PRUNE_INTERVAL_MINUTES)
+    async def prune_warns(self):
+        pruned = prune_expired_warns()
+        if pruned:
+            log_moderation.info("%d warn kadaluarsa dihapus.", pruned)
+
+    async def on_app_command_completion(self, interaction, command):
+        observe_command(interaction, command, "ok")
+
+    async def close(self):
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        self.prune_warns.cancel()
+        self.announcer.stop()
+        self.onboarding.stop()
+        self.raid_guard.stop()
+        self.ticket_sweeper.stop()
+        await outbound.drain()
+        outbound.stop()
+        if self.session:
+            await self.session.close()
+        self.card_executor.shutdown(wait=False, cancel_futures=True)
+        if self.live_transcripts is not None:
+            self.live_transcripts.close()
+        await super().close()
+        store.close()
+
+    async def get_card_avatar(self, member):
+        asset = member.display_avatar
+        avatar = self.avatar_cache.get(asset.key)
+        if avatar is not None:
+            return avatar
 
         # Ambil avatar
-        async with aiohttp.ClientSession() as session:
-            async with session.get(member.display_avatar.url) as resp:
-                avatar_bytes = await resp.read()
-
-        avatar = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
-
-        # Avatar size scaled for 735×386
-        AVATAR_SIZE = 170
-        BORDER_SIZE = 5
-        FULL_SIZE = AVATAR_SIZE + BORDER_SIZE * 2
-
-        # Circle mask
-        avatar = avatar.resize((AVATAR_SIZE, AVATAR_SIZE))
-        mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
-        ImageDraw.Draw(mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
-        avatar.putalpha(mask)
-
-        # Frame around avatar
-        frame = Image.new("RGBA", (FULL_SIZE, FULL_SIZE), (0, 0, 0, 0))
-        ImageDraw.Draw(frame).ellipse((0, 0, FULL_SIZE, FULL_SIZE), fill=(255, 255, 255))
-        frame.paste(avatar, (BORDER_SIZE, BORDER_SIZE), avatar)
+        async with self.session.get(asset.with_size(AVATAR_FETCH_SIZE).url) as resp:
+            if resp.status == 429:
+                rate_limit_hits.inc("avatar_cdn")
+            resp.raise_for_status()
+            avatar_bytes = await resp.read()
 
-        # Center avatar
-        avatar_x = CANVAS_W // 2 - FULL_SIZE // 2
-        avatar_y = 50
-        background.paste(frame, (avatar_x, avatar_y), frame)
+        loop = asyncio.get_running_loop()
+        avatar = await loop.run_in_executor(self.card_executor, self.card_renderer.prepare_avatar, avatar_bytes)
+        self.avatar_cache.put(asset.key, avatar)
+        return avatar
 
-        # Draw text
-        draw = ImageDraw.Draw(background)
-
-        font_big = ImageFont.truetype("DIN-Next-LT-W04-Heavy.ttf", 60)
-        font_small = ImageFont.truetype("DIN-Next-LT-W04-Heavy.ttf", 28)
-
-        text_y = avatar_y + FULL_SIZE + 60
-        name_y = text_y + 25
-
-        draw_text_with_shadow(draw, (CANVAS_W // 2, text_y), title, font_big, color)
-        draw_text_with_shadow(draw, (CANVAS_W // 2, name_y), member.name.upper(), font_small, "white")
+    async def create_welcome_image(self, member, mode):
+        avatar = await self.get_card_avatar(member)
+        loop = asyncio.get_running_loop()
+        with Timer(render_latency, "card"):
+            return await loop.run_in_executor(
+                self.card_executor, self.card_renderer.render, avatar, member.name, mode
+            )
 
-        # Output
-        buffer = io.BytesIO()
-        background.save(buffer, "PNG")
-        buffer.seek(0)
-        return buffer
+    async def create_collage_image(self, members, mode):
+        shown = members[:COLLAGE_COLUMNS * COLLAGE_ROWS]
+        results = await asyncio.gather(*(self.get_card_avatar(m) for m in shown), return_exceptions=True)
+        avatars = [a for a in results if not isinstance(a, BaseException)]
+        loop = asyncio.get_running_loop()
+        with Timer(render_latency, "collage"):
+            return await loop.run_in_executor(
+                self.card_executor, self.card_renderer.render_collage, avatars, len(members), mode
+            )
 
 
     async def on_member_join(self, member):
-        WELCOME_CHANNEL = 1434568585132511505
-        DEFAULT_ROLE_ID = 1443627247809335429
-
-        channel = member.guild.get_channel(WELCOME_CHANNEL)
-        if not channel:
-            return
-
-        image = await self.create_welcome_image(member, "welcome")
-
-        await channel.send(
-            content=f"Welcome {member.mention} to **{member.guild.name}**! 🎉",
-            file=dc.File(image, "welcome.png")
-        )
-
-        try:
-            await member.send(f"Welcome to **{member.guild.name}**, {member.name}!")
-        except:
-            print("DM tidak bisa dikirim.")
-
-        role = member.guild.get_role(DEFAULT_ROLE_ID)
-        if role:
-            try:
-                await member.add_roles(role)
-                print(f"[ROLE] {member.name} telah diberi role {role.name}")
-            except Exception as e:
-                print(f"Gagal memberikan role: {e}")
-
-        print(f"[JOIN] {member.name} di {member.guild.name}")
+        log_welcome.info("JOIN %s di %s", member.name, member.guild.name)
+        if not self.raid_guard.on_join(member):
+            return  # lockdown: kartu, DM dan role ditahan
+        self.announcer.enqueue(member, "welcome")
+        self.onboarding.enqueue(member)
 
     async def on_member_remove(self, member):
-        WELCOME_CHANNEL = 1434568585132511505
-        channel = member.guild.get_channel(WELCOME_CHANNEL)
-        if not channel:
-            return
-
-        image = await self.create_welcome_image(member, "goodbye")
-
-        await channel.send(
-            content=f"{member.mention} has left the server 😭.",
-            file=dc.File(image, "goodbye.png")
-        )
-        print(f"[LEAVE] {member.name} dari {member.guild.name}")
+        log_welcome.info("LEAVE %s dari %s", member.name, member.guild.name)
+        if self.raid_guard.on_leave(member):
+            self.announcer.enqueue(member, "goodbye")
 
 client = Client()
 
@@ -627,13 +3272,7 @@ async def kick(interaction: dc.Interaction, member: dc.Member, reason: str = "No
             ephemeral=True
         )
 
-    IMMUNE_USERS = [
-        706872385844019200,
-        768832997125259315,
-        987654321098765432,
-    ]
-
-    if member.id in IMMUNE_USERS:
+    if is_immune(member):
         return await interaction.response.send_message(
             f"❌ {member.mention} cannot be kicked (protected user).",
             ephemeral=True
@@ -641,6 +3280,7 @@ async def kick(interaction: dc.Interaction, member: dc.Member, reason: str = "No
 
     try:
         await member.kick(reason=reason)
+        log_moderation.info("%s kicked %s: %s", interaction.user, member, reason)
         await interaction.response.send_message(
             f"{member.mention} has been kicked.\nReason: {reason}"
         )
@@ -656,13 +3296,7 @@ async def ban(interaction: dc.Interaction, member: dc.Member, reason: str = "No
     if not interaction.user.guild_permissions.ban_members:
         return await interaction.response.send_message("You don't have permission to ban members.", ephemeral=True)
     
-    IMMUNE_USERS = [
-        706872385844019200,
-        768832997125259315,
-        987654321098765432,
-    ]
-
-    if member.id in IMMUNE_USERS:
+    if is_immune(member):
         return await interaction.response.send_message(
             f"❌ {member.mention} cannot be Ban (protected user).",
             ephemeral=True
@@ -670,6 +3304,7 @@ async def ban(interaction: dc.Interaction, member: dc.Member, reason: str = "No
     
     try:
         await member.ban(reason=reason)
+        log_moderation.info("%s banned %s: %s", interaction.user, member, reason)
         await interaction.response.send_message(f"{member.mention} has been banned.\nReason: {reason}")
     except Exception as e:
         await interaction.response.send_message(f"Failed to ban {member.mention}. Error: {e}", ephemeral=True)
@@ -680,8 +3315,12 @@ async def nigger(interaction: dc.Interaction, member: dc.Member):
     await interaction.response.send_message(f"{member.mention}'ve been nigger by {interaction.user.mention}")
 
 @client.tree.command(name="warn", description="Warn a member.")
-@app_commands.describe(member="The member to warn", reason="Reason for the warning")
-async def warn(interaction: dc.Interaction, member: dc.Member, reason: str = "No reason provided"):
+@app_commands.describe(
+    member="The member to warn",
+    reason="Reason for the warning",
+    expires_in_days="Optional: remove the warn automatically after this many days"
+)
+async def warn(interaction: dc.Interaction, member: dc.Member, reason: str = "No reason provided", expires_in_days: app_commands.Range[int, 1, 3650] = None):
     if not interaction.user.guild_permissions.kick_members:
         await interaction.response.send_message("You don't have permission to warn members.", ephemeral=True)
         return
@@ -689,17 +3328,15 @@ async def warn(interaction: dc.Interaction, member: dc.Member, reason: str = "No
     guild_id = str(interaction.guild.id)
     member_id = str(member.id)
 
-    if guild_id not in warns:
-        warns[guild_id] = {}
-
-    if member_id not in warns[guild_id]:
-        warns[guild_id][member_id] = []
+    days = expires_in_days if expires_in_days is not None else WARN_DEFAULT_EXPIRY_DAYS
+    expires_at = time.time() + days * 86400 if days else None
 
-    warns[guild_id][member_id].append(reason)
-    save_warns()
-
-    total_warns = len(warns[guild_id][member_id])
-    await interaction.response.send_message(f"{member.mention} has been warned.\nReason: {reason}\nTotal warns: {total_warns}")
+    total_warns = add_warn(guild_id, member_id, reason, interaction.user.id, expires_at)
+    log_moderation.info("%s warned %s (%d total): %s", interaction.user, member, total_warns, reason)
+    message = f"{member.mention} has been warned.\nReason: {reason}\nTotal warns: {total_warns}"
+    if expires_at:
+        message += f"\nExpires: <t:{int(expires_at)}:R>"
+    await interaction.response.send_message(message)
 
 @client.tree.command(name="delwarn", description="Remove a warning from a member.")
 @app_commands.describe(member="The member to remove a warning from", index="Optional: index of warn to remove (starts from 1)")
@@ -711,26 +3348,18 @@ async def unwarn(interaction: dc.Interaction, member: dc.Member, index: int = No
     guild_id = str(interaction.guild.id)
     member_id = str(member.id)
 
-    if guild_id not in warns or member_id not in warns[guild_id] or len(warns[guild_id][member_id]) == 0:
+    member_warns = get_warns(guild_id, member_id)
+    if len(member_warns) == 0:
         await interaction.response.send_message(f"{member.mention} has no warns.", ephemeral=True)
         return
 
-    if index is None:
-        removed_reason = warns[guild_id][member_id].pop()  # Hapus terakhir
-    else:
-        if index < 1 or index > len(warns[guild_id][member_id]):
-            await interaction.response.send_message(f"Invalid index. Member has {len(warns[guild_id][member_id])} warns.", ephemeral=True)
-            return
-        removed_reason = warns[guild_id][member_id].pop(index-1)
+    if index is not None and (index < 1 or index > len(member_warns)):
+        await interaction.response.send_message(f"Invalid index. Member has {len(member_warns)} warns.", ephemeral=True)
+        return
 
-    total_warns = len(warns[guild_id].get(member_id, []))
+    removed_reason = remove_warn(guild_id, member_id, index)  # index None = hapus terakhir
+    total_warns = len(member_warns) - 1
 
-    if len(warns[guild_id].get(member_id, [])) == 0:
-        warns[guild_id].pop(member_id, None)
-    if len(warns.get(guild_id, {})) == 0:
-        warns.pop(guild_id, None)
-
-    save_warns()
     await interaction.response.send_message(
         f"Removed warn from {member.mention}.\nRemoved reason: {removed_reason}\nTotal warns left: {total_warns}"
     )
@@ -740,12 +3369,16 @@ async def unwarn(interaction: dc.Interaction, member: dc.Member, index: int = No
 async def view_warns(interaction: dc.Interaction, member: dc.Member):
     guild_id = str(interaction.guild.id)
     member_id = str(member.id)
-    if guild_id not in warns or member_id not in warns[guild_id] or len(warns[guild_id][member_id]) == 0:
+    member_warns = get_warns(guild_id, member_id)
+    if len(member_warns) == 0:
         await interaction.response.send_message(f"{member.mention} has no warns.", ephemeral=True)
         return
-    member_warns = warns[guild_id][member_id]
-    warn_list = "\n".join([f"{i+1}. {reason}" for i, reason in enumerate(member_warns)])
-    await interaction.response.send_message(f"Warns for {member.mention}:\n{warn_list}")
+    view = WarnListView(interaction.user.id, member, member_warns)
+    await interaction.response.send_message(
+        f"Warns for {member.mention}:",
+        embed=view.build_embed(),
+        view=view if view.pages > 1 else dc.utils.MISSING
+    )
 
 @client.tree.command(name="timeout", description="Temporarily mute a member.")
 @app_commands.describe(member="The member to timeout", minutes="Duration in minutes", reason="Reason for timeout")
@@ -756,12 +3389,116 @@ async def timeout(interaction: dc.Interaction, member: dc.Member, minutes: int =
     
     try:
         await member.timeout(duration=timedelta(minutes=minutes), reason=reason)
+        log_moderation.info("%s timed out %s for %d min: %s", interaction.user, member, minutes, reason)
         await interaction.response.send_message(
             f"{member.mention} has been timed out for {minutes} minutes.\nReason: {reason}"
         )
     except Exception as e:
         await interaction.response.send_message(f"Failed to timeout {member.mention}. Error: {e}", ephemeral=True)
 
+@client.tree.command(name="bulkmod", description="Ban/kick/timeout many members at once (raid mode).")
+@app_commands.describe(
+    action="What to do with the matched members",
+    ids="Member IDs or mentions, separated by spaces/commas",
+    joined_within_minutes="Only members who joined in the last N minutes",
+    account_age_days="Only accounts created in the last N days",
+    timeout_minutes="Timeout length (action=timeout)",
+    reason="Reason shown in the audit log",
+    dry_run="Only count the matched members, don't act"
+)
+async def bulkmod(
+    interaction: dc.Interaction,
+    action: Literal["ban", "kick", "timeout"],
+    ids: str = None,
+    joined_within_minutes: app_commands.Range[int, 1, 43200] = None,
+    account_age_days: app_commands.Range[int, 1, 3650] = None,
+    timeout_minutes: app_commands.Range[int, 1, 40320] = 60,
+    reason: str = "Raid cleanup",
+    dry_run: bool = False
+):
+    permission, past = BULK_ACTIONS[action]
+    if not getattr(interaction.user.guild_permissions, permission):
+        return await interaction.response.send_message(f"You don't have permission to {action} members.", ephemeral=True)
+    guild = interaction.guild
+    targets, truncated = select_bulk_targets(guild, action, parse_member_ids(ids), joined_within_minutes, account_age_days)
+    if not targets:
+        return await interaction.response.send_message(
+            "❌ No members matched. Give `ids`, `joined_within_minutes` or `account_age_days`.", ephemeral=True
+        )
+    immune = sum(1 for t in targets if is_immune(t))
+    partial = (
+        f"\n⚠ {truncated} more matched but were left out (limit {BULK_MAX_TARGETS} per run), run it again after this."
+        if truncated else ""
+    )
+    if dry_run:
+        return await interaction.response.send_message(
+            f"🔎 {len(targets) - immune} member(s) would be {past} ({immune} protected, skipped).{partial}", ephemeral=True
+        )
+
+    # Reserve sebelum await pertama, supaya dua moderator tidak lolos bareng
+    if not bulk_moderation.reserve(guild.id):
+        return await interaction.response.send_message("⏳ Bulk moderation is already running in this server.", ephemeral=True)
+    try:
+        await interaction.response.send_message(f"⏳ Bulk {action}: 0/{len(targets) - immune}…{partial}", ephemeral=True)
+
+        async def progress(done, total):
+            await interaction.edit_original_response(content=f"⏳ Bulk {action}: {done}/{total}…{partial}")
+
+        result = await bulk_moderation.run(guild, action, targets, f"{reason} (by {interaction.user})", timeout_minutes, progress)
+        log_moderation.info(
+            "%s bulk %s: %d ok, %d gagal, %d immune", interaction.user, action, result.done, result.failed, result.skipped
+        )
+        await interaction.edit_original_response(
+            content=f"✅ Bulk {action} done: **{result.done}** ok, **{result.failed}** failed, **{result.skipped}** protected.{partial}"
+        )
+    finally:
+        bulk_moderation.release(guild.id)
+
+@client.tree.command(name="raid", description="Raid lockdown status, act on suspects, or end lockdown.")
+@app_commands.describe(action="status, ban/kick/timeout all suspects, or end the lockdown now")
+async def raid(interaction: dc.Interaction, action: Literal["status", "ban", "kick", "timeout", "end"] = "status"):
+    permission = BULK_ACTIONS[action][0] if action in BULK_ACTIONS else "moderate_members"
+    if not getattr(interaction.user.guild_permissions, permission):
+        return await interaction.response.send_message("You don't have permission to do that.", ephemeral=True)
+    guild = interaction.guild
+    guard = interaction.client.raid_guard
+
+    if action == "status":
+        lockdown = guard.lockdowns.get(guild.id)
+        state = "🚨 **active**" if lockdown else "✅ off"
+        held = len(lockdown.held) if lockdown else 0
+        return await interaction.response.send_message(
+            f"Lockdown: {state}\nSuspects waiting: **{guard.pending_suspects(guild.id)}**\nHeld joins: **{held}**",
+            ephemeral=True
+        )
+    if action == "end":
+        if not guard.is_locked(guild.id):
+            return await interaction.response.send_message("Lockdown is not active.", ephemeral=True)
+        guard.release(guild)
+        log_moderation.info("%s mengakhiri lockdown %s", interaction.user, guild.name)
+        return await interaction.response.send_message("✅ Lockdown ended.", ephemeral=True)
+
+    # Reserve dulu baru ambil suspect, supaya suspect tidak hilang kalau guild sibuk
+    if not bulk_moderation.reserve(guild.id):
+        return await interaction.response.send_message("⏳ Bulk moderation is already running in this server.", ephemeral=True)
+    try:
+        targets = [m for m in guard.take_suspects(guild.id) if action == "ban" or guild.get_member(m.id) is not None]
+        if not targets:
+            return await interaction.response.send_message("No suspects waiting.", ephemeral=True)
+
+        await interaction.response.send_message(f"⏳ Raid {action}: 0/{len(targets)}…", ephemeral=True)
+
+        async def progress(done, total):
+            await interaction.edit_original_response(content=f"⏳ Raid {action}: {done}/{total}…")
+
+        result = await bulk_moderation.run(guild, action, targets, f"Raid cleanup (by {interaction.user})", progress=progress)
+        log_moderation.info("%s raid %s: %d ok, %d gagal", interaction.user, action, result.done, result.failed)
+        await interaction.edit_original_response(
+            content=f"✅ Raid {action} done: **{result.done}** ok, **{result.failed}** failed, **{result.skipped}** protected."
+        )
+    finally:
+        bulk_moderation.release(guild.id)
+
 @client.tree.command(name="deltimeout", description="Remove timeout from a member.")
 @app_commands.describe(member="The member to remove timeout from")
 async def untimeout(interaction: dc.Interaction, member: dc.Member):
@@ -850,13 +3587,34 @@ async def changelog(
 
     embed.set_footer(text="VoraHub Official Update • © 2025")
 
-    await changelog_channel.send(tag_message, embed=embed)
+    # Antrian channel bisa lama, ack dulu supaya tidak lewat deadline 3 detik
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    try:
+        await outbound.send(changelog_channel, content=tag_message, embed=embed)
+    except dc.HTTPException as e:
+        return await interaction.followup.send(f"❌ Gagal kirim changelog: {e}", ephemeral=True)
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         f"✅ Changelog **{tier}** untuk **{game}** berhasil dikirim ke <#{CHANGELOG_CHANNEL_ID}>.",
         ephemeral=True
     )
 
+@client.tree.command(name="reloadtriggers", description="Reload keyword triggers from triggers.json.")
+async def reloadtriggers(interaction: dc.Interaction):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message(
+            "❌ Command ini **khusus Admin saja**.",
+            ephemeral=True
+        )
+    try:
+        client.triggers = TriggerRouter.load()
+    except (OSError, ValueError, KeyError) as e:
+        return await interaction.response.send_message(f"❌ Gagal load triggers: {e}", ephemeral=True)
+    await interaction.response.send_message(
+        f"✅ {len(client.triggers.rules)} trigger dimuat.",
+        ephemeral=True
+    )
+
 @client.tree.command(name="ticketpanel", description="Send the ticket creation panel.")
 async def ticketpanel(interaction: dc.Interaction):
     if not interaction.user.guild_permissions.manage_channels:
@@ -891,7 +3649,7 @@ async def add_user(interaction: dc.Interaction, user: dc.Member):
             ephemeral=True
         )
 
-    if channel.id not in active_tickets.values():
+    if not active_tickets.is_ticket(channel.id):
         return await interaction.response.send_message(
             "❌ Kamu tidak bisa berinteraksi dengan channel ini karena bukan ticket.",
             ephemeral=True
@@ -920,19 +3678,19 @@ async def remove_user(interaction: dc.Interaction, user: dc.Member):
             ephemeral=True
         )
 
-    if channel.id not in active_tickets.values():
+    ticket = active_tickets.get_by_channel(channel.id)
+    if ticket is None:
         return await interaction.response.send_message(
             "❌ Kamu tidak bisa berinteraksi dengan channel ini karena bukan ticket.",
             ephemeral=True
         )
 
     # Jangan keluarkan creator ticket
-    for creator_id, ticket_channel_id in active_tickets.items():
-        if ticket_channel_id == channel.id and user.id == creator_id:
-            return await interaction.response.send_message(
-                "❌ Kamu tidak bisa mengeluarkan *pembuat ticket*.",
-                ephemeral=True
-            )
+    if user.id == ticket.user_id:
+        return await interaction.response.send_message(
+            "❌ Kamu tidak bisa mengeluarkan *pembuat ticket*.",
+            ephemeral=True
+        )
 
     await channel.set_permissions(user, overwrite=None)
 
@@ -948,7 +3706,9 @@ load_dotenv()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 
-client.run(TOKEN)
+# Guard supaya benchmark.py bisa import Client tanpa login
+if __name__ == "__main__":
+    client.run(TOKEN, log_handler=None)  # logging sudah di-setup di setup_logging()
 
 
 